@@ -0,0 +1,88 @@
+"""
+Benchmark for detect_support_resistance.
+
+Checks the vectorized detector against the original loop implementation on
+small inputs, then times it on synthetic random-walk bars up to 250k rows.
+
+Run from the repo root:
+    python backend/benchmarks/bench_support_resistance.py
+"""
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import detect_support_resistance  # noqa: E402
+
+
+def make_bars(n, seed=0):
+    """Random-walk OHLC bars."""
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = close * rng.uniform(0.002, 0.02, n)
+    return pd.DataFrame({
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+    })
+
+
+def legacy_support_resistance(data, lookback=20, min_touches=2):
+    """The original O(n^2) loop implementation, kept as a reference."""
+    highs = data['High']
+    lows = data['Low']
+
+    resistance_levels = []
+    support_levels = []
+    for i in range(lookback, len(data) - lookback):
+        current_high = highs.iloc[i]
+        if all(highs.iloc[j] < current_high for j in range(i - lookback, i + lookback + 1) if j != i):
+            touches = sum(1 for j in range(len(data)) if abs(lows.iloc[j] - current_high) / current_high < 0.02)
+            if touches >= min_touches:
+                resistance_levels.append({"level": current_high, "touches": touches})
+
+        current_low = lows.iloc[i]
+        if all(lows.iloc[j] > current_low for j in range(i - lookback, i + lookback + 1) if j != i):
+            touches = sum(1 for j in range(len(data)) if abs(highs.iloc[j] - current_low) / current_low < 0.02)
+            if touches >= min_touches:
+                support_levels.append({"level": current_low, "touches": touches})
+
+    resistance_levels.sort(key=lambda x: x["touches"], reverse=True)
+    support_levels.sort(key=lambda x: x["touches"], reverse=True)
+    return resistance_levels[:3], support_levels[:3]
+
+
+def strip(levels):
+    return [(round(float(x["level"]), 6), x["touches"]) for x in levels]
+
+
+def main():
+    print("Equivalence with the loop implementation")
+    for n in (100, 500, 2000):
+        data = make_bars(n, seed=n)
+        start = perf_counter()
+        res, sup = legacy_support_resistance(data)
+        legacy_time = perf_counter() - start
+
+        start = perf_counter()
+        result = detect_support_resistance(data)
+        new_time = perf_counter() - start
+
+        match = strip(result["resistance"]) == strip(res) and strip(result["support"]) == strip(sup)
+        print(f"  n={n:>6}  legacy={legacy_time * 1000:9.1f} ms  vectorized={new_time * 1000:7.2f} ms  match={match}")
+
+    print("Scaling")
+    for n in (1_000, 10_000, 100_000, 250_000):
+        data = make_bars(n)
+        start = perf_counter()
+        detect_support_resistance(data)
+        elapsed = perf_counter() - start
+        print(f"  n={n:>7}  {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,140 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import yfinance as yf
 import pandas as pd
-from datetime import datetime, time
+from datetime import datetime, time, date, timedelta
 import pytz
-from cachetools import cached, TTLCache
+from cachetools import cached, TTLCache, TLRUCache, LRUCache
+from cachetools.keys import hashkey
 import feedparser
 import urllib.parse
+from email.utils import parsedate_to_datetime
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import re
+import hashlib
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from collections import deque
+from threading import Lock, Thread
+import copy
+from functools import partial, wraps
+from time import monotonic
+from statistics import NormalDist
+import json
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+import httpx
+import orjson
+
+
+# JSON responses
+# orjson handles NumPy scalars and arrays directly and writes NaN/inf as null.
+# For cached handlers the encoded bytes are kept per cached object, so a
+# cache hit skips serialization entirely.
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+encoded_json = LRUCache(maxsize=1000)
+encoded_json_lock = Lock()
+
+
+def json_default(obj):
+    """Fallback for values orjson doesn't encode natively."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_json(value):
+    return orjson.dumps(value, default=json_default, option=JSON_OPTIONS)
+
+
+def encoded_parts(value):
+    """
+    Encoded JSON for value, or one encoded item per element for lists (so
+    metadata can be spliced into each), reused while value is cached.
+    """
+    with encoded_json_lock:
+        entry = encoded_json.get(id(value))
+    if entry is not None and entry[0] is value:
+        return entry[1]
+
+    parts = [encode_json(item) for item in value] if isinstance(value, list) else encode_json(value)
+    with encoded_json_lock:
+        # Holding value keeps its id from being reused while the entry lives
+        encoded_json[id(value)] = (value, parts)
+    return parts
+
+
+def add_fields(encoded, fields):
+    """Splice the encoded fields into an encoded JSON object; others unchanged."""
+    if not encoded.startswith(b"{"):
+        return encoded
+    separator = b"," if encoded != b"{}" else b""
+    return encoded[:-1] + separator + encode_json(fields)[1:]
+
+
+class CachedJSON:
+    """A cached value to render, optionally tagged with extra fields (e.g. dataAge)."""
+
+    def __init__(self, value, fields=None):
+        self.value = value
+        self.fields = fields
 
-app = FastAPI()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, reusing encodings of CachedJSON values."""
+
+    def render(self, content):
+        if not isinstance(content, CachedJSON):
+            return encode_json(content)
+
+        parts = encoded_parts(content.value)
+        if content.fields:
+            if isinstance(parts, list):
+                parts = [add_fields(part, content.fields) for part in parts]
+            else:
+                parts = add_fields(parts, content.fields)
+        return b"[" + b",".join(parts) + b"]" if isinstance(parts, list) else parts
+
+
+def json_response(fn):
+    """
+    Decorator for cached handlers: return the value as a FastJSONResponse,
+    skipping FastAPI's jsonable_encoder. Put it above the cache decorator.
+    """
+
+    def render(value):
+        return value if isinstance(value, Response) else FastJSONResponse(CachedJSON(value))
+
+    if asyncio.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            return render(await fn(*args, **kwargs))
+        return async_wrapper
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return render(fn(*args, **kwargs))
+
+    return wrapper
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global provider_loop
+    provider_loop = asyncio.get_running_loop()
+    yield
+    provider_loop = None
+    await close_providers()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -22,39 +145,869 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one execution.
+    The first caller runs the function, callers arriving while it is still
+    running wait for and share its result (or exception).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = Lock()
+        self.in_flight = {}  # key -> Future
+        self.executed = 0
+        self.deduplicated = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def stats(self):
+        return {"executed": self.executed, "deduplicated": self.deduplicated}
+
+
+single_flights = {}
+
+
+def single_flight(name):
+    """
+    Decorator: concurrent calls with equal arguments share one execution.
+    Place it under @cached so only cache misses are coalesced.
+    """
+    flight = single_flights.setdefault(name, SingleFlight(name))
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return flight.do(hashkey(*args, **kwargs), partial(fn, *args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines: concurrent awaits of the same key share one task."""
+
+    async def do(self, key, fn):
+        with self.lock:
+            task = self.in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self.in_flight[key] = task
+                task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+
+def async_single_flight(name):
+    """Decorator: @single_flight for async functions."""
+    flight = single_flights.setdefault(name, AsyncSingleFlight(name))
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await flight.do(hashkey(*args, **kwargs), partial(fn, *args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+def async_cached(cache):
+    """Decorator: cachetools-style @cached for async functions."""
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+            value = await fn(*args, **kwargs)
+            cache[key] = value
+            return value
+        return wrapper
+
+    return decorator
+
+
+class StaleWhileRevalidateCache:
+    """
+    Cache that keeps serving an expired value while refreshing it in the background.
+    Entries younger than `ttl` are fresh (`ttl` may be a callable returning
+    seconds, evaluated when the entry is stored). Older entries are still
+    returned for up to `max_stale` more seconds (including while upstream
+    keeps failing) and trigger one background refresh. Anything older is
+    fetched inline.
+    """
+
+    def __init__(self, maxsize, ttl, max_stale):
+        self.entries = LRUCache(maxsize=maxsize)  # key -> (value, fetched_at, expires_at)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.lock = Lock()
+        self.refreshing = set()
+        self.tasks = set()  # background refreshes of async fetches
+
+    def store(self, key, value):
+        now = monotonic()
+        ttl = self.ttl() if callable(self.ttl) else self.ttl
+        with self.lock:
+            self.entries[key] = (value, now, now + ttl)
+
+    def lookup(self, key):
+        """(value, age in seconds, is_stale) if the entry can be served, else None."""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        value, fetched_at, expires_at = entry
+        now = monotonic()
+        if now < expires_at + self.max_stale:
+            return value, now - fetched_at, now >= expires_at
+        return None
+
+    def get_or_fetch(self, key, fetch):
+        """Return (value, age in seconds, is_stale)."""
+        hit = self.lookup(key)
+        if hit is not None:
+            if hit[2]:
+                self.revalidate(key, fetch)
+            return hit
+
+        value = fetch()
+        self.store(key, value)
+        return value, 0.0, False
+
+    async def get_or_fetch_async(self, key, fetch):
+        """get_or_fetch for a coroutine function; refreshes run as tasks on the loop."""
+        hit = self.lookup(key)
+        if hit is not None:
+            if hit[2]:
+                self.revalidate_async(key, fetch)
+            return hit
+
+        value = await fetch()
+        self.store(key, value)
+        return value, 0.0, False
+
+    def claim_refresh(self, key):
+        """True if no refresh of key is running; the caller then runs one."""
+        with self.lock:
+            if key in self.refreshing:
+                return False
+            self.refreshing.add(key)
+            return True
+
+    def release_refresh(self, key):
+        with self.lock:
+            self.refreshing.discard(key)
+
+    def revalidate(self, key, fetch):
+        if not self.claim_refresh(key):
+            return
+
+        def run():
+            try:
+                self.store(key, fetch())
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+            finally:
+                self.release_refresh(key)
+
+        revalidate_executor.submit(run)
+
+    def revalidate_async(self, key, fetch):
+        if not self.claim_refresh(key):
+            return
+
+        async def run():
+            try:
+                self.store(key, await fetch())
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+            finally:
+                self.release_refresh(key)
+
+        task = asyncio.ensure_future(run())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+revalidate_executor = ThreadPoolExecutor(max_workers=8)
+
+
+def swr_cached(cache):
+    """
+    Decorator: serve from a StaleWhileRevalidateCache and tag the response
+    with dataAge/stale (added to the dict, or to each dict of a list). Keys
+    include the function name, so endpoints can share one cache.
+    """
+
+    def respond(value, age, stale):
+        return FastJSONResponse(CachedJSON(value, {"dataAge": round(age, 1), "stale": stale}))
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key = hashkey(fn.__name__, *args, **kwargs)
+                return respond(*await cache.get_or_fetch_async(key, partial(fn, *args, **kwargs)))
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = hashkey(fn.__name__, *args, **kwargs)
+            return respond(*cache.get_or_fetch(key, partial(fn, *args, **kwargs)))
+        return wrapper
+
+    return decorator
+
+
+# NSE/BSE trading calendar
+IST = pytz.timezone("Asia/Kolkata")
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+# Closing prices and the day's bar settle shortly after the close, so cached
+# market data keeps its intraday TTL until then
+MARKET_SETTLE = time(16, 0)
+
+# Weekday trading holidays from the NSE holiday circulars (BSE follows the
+# same list). Add the next year's dates when the exchange publishes them.
+MARKET_HOLIDAYS = {
+    # 2025
+    date(2025, 2, 26),  # Mahashivratri
+    date(2025, 3, 14),  # Holi
+    date(2025, 3, 31),  # Id-Ul-Fitr
+    date(2025, 4, 10),  # Shri Mahavir Jayanti
+    date(2025, 4, 14),  # Dr. Baba Saheb Ambedkar Jayanti
+    date(2025, 4, 18),  # Good Friday
+    date(2025, 5, 1),   # Maharashtra Day
+    date(2025, 8, 15),  # Independence Day
+    date(2025, 8, 27),  # Ganesh Chaturthi
+    date(2025, 10, 2),  # Mahatma Gandhi Jayanti / Dussehra
+    date(2025, 10, 21),  # Diwali Laxmi Pujan (evening Muhurat session only)
+    date(2025, 10, 22),  # Balipratipada
+    date(2025, 11, 5),  # Prakash Gurpurb Sri Guru Nanak Dev
+    date(2025, 12, 25),  # Christmas
+    # 2026
+    date(2026, 1, 26),  # Republic Day
+    date(2026, 3, 3),   # Holi
+    date(2026, 3, 26),  # Shri Ram Navami
+    date(2026, 3, 31),  # Shri Mahavir Jayanti
+    date(2026, 4, 3),   # Good Friday
+    date(2026, 4, 14),  # Dr. Baba Saheb Ambedkar Jayanti
+    date(2026, 5, 1),   # Maharashtra Day
+    date(2026, 5, 28),  # Bakri Id
+    date(2026, 6, 26),  # Muharram
+    date(2026, 9, 14),  # Ganesh Chaturthi
+    date(2026, 10, 2),  # Mahatma Gandhi Jayanti
+    date(2026, 10, 20),  # Dussehra
+    date(2026, 11, 10),  # Diwali Balipratipada
+    date(2026, 11, 24),  # Prakash Gurpurb Sri Guru Nanak Dev
+    date(2026, 12, 25),  # Christmas
+}
+
+
+def is_trading_day(day):
+    """True if the exchange holds a regular session on this date."""
+    return day.weekday() < 5 and day not in MARKET_HOLIDAYS
+
+
+def next_session_open(now):
+    """Start of the next regular session after `now` (an IST datetime)."""
+    day = now.date()
+    if not (is_trading_day(day) and now.time() < MARKET_OPEN):
+        day += timedelta(days=1)
+        while not is_trading_day(day):
+            day += timedelta(days=1)
+    return IST.localize(datetime.combine(day, MARKET_OPEN))
+
+
+def unsettled_session_day(now):
+    """Date of the next session still to settle: today's until MARKET_SETTLE, else the next one."""
+    if is_trading_day(now.date()) and now.time() < MARKET_SETTLE:
+        return now.date()
+    return next_session_open(now).date()
+
+
+def market_ttl(open_ttl):
+    """
+    TTL in seconds for market data: `open_ttl` while prices can move,
+    otherwise until the next session opens.
+    """
+    now = datetime.now(IST)
+    if is_trading_day(now.date()) and MARKET_OPEN <= now.time() < MARKET_SETTLE:
+        return open_ttl
+    return max(open_ttl, (next_session_open(now) - now).total_seconds())
+
+
+def market_ttu(open_ttl):
+    """Per-entry expiry function for TLRUCache that follows market_ttl."""
+    return lambda key, value, now: now + market_ttl(open_ttl)
+
+
 # Caches
+# cachetools caches aren't thread-safe, and these are shared by the event
+# loop, Starlette's threadpool and the fan-out/revalidate executors, so each
+# has a lock held around every read and write (never while computing a value)
 # Market status changes intraday, TTL 1 min
 market_status_cache = TTLCache(maxsize=1, ttl=60)
-# Quotes change intraday, TTL 30s
-quotes_cache = TTLCache(maxsize=500, ttl=30)
-# Analysis (fundamentals/technicals) don't change fast, TTL 1 hour
-analysis_cache = TTLCache(maxsize=100, ttl=3600)
-# History data TTL 5 mins for intraday, maybe longer for 1Y
-history_cache = TTLCache(maxsize=500, ttl=300)
+market_status_lock = Lock()
+# Market data caches below use their TTL only while the market is open;
+# outside trading hours entries are kept until the next session opens.
+# Quotes change intraday, TTL 30s. Served stale for up to 15 mins while refreshing
+quotes_cache = StaleWhileRevalidateCache(maxsize=500, ttl=lambda: market_ttl(30), max_stale=900)
+# Analysis (fundamentals/technicals) don't change fast, TTL 1 hour, stale for up to a day
+analysis_cache = StaleWhileRevalidateCache(maxsize=500, ttl=lambda: market_ttl(3600), max_stale=86400)
+# History data TTL 5 mins for intraday, maybe longer for 1Y.
+# Only used on the event loop, so it needs no lock.
+history_cache = TLRUCache(maxsize=500, ttu=market_ttu(300))
+# Fundamentals (stock.info) change at most a few times a day, TTL 6 hours
+fundamentals_cache = TTLCache(maxsize=1000, ttl=6 * 3600)
+fundamentals_lock = Lock()
+# Raw OHLCV bars keyed by (ticker, interval), shared by every endpoint.
+# Sized to hold a full screener universe alongside everything else.
+ohlcv_cache = TLRUCache(maxsize=2000, ttu=market_ttu(300))
+ohlcv_lock = Lock()
+# Aligned dates x tickers panels keyed by (tickers, period)
+panel_cache = TLRUCache(maxsize=32, ttu=market_ttu(300))
+panel_lock = Lock()
+# Benchmark index daily returns keyed by (symbol, period)
+benchmark_cache = TLRUCache(maxsize=32, ttu=market_ttu(300))
+benchmark_lock = Lock()
+
+
+# Approximate calendar length of each yfinance period, used to decide
+# whether a stored series is long enough to serve a request
+PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+    "max": float("inf"),
+}
+# Longest period any endpoint needs per interval. Fetching this up front
+# means the stock page (1y), risk analysis (2y) and pivots (5d) share one download.
+PREFETCH_PERIOD = {"1d": "2y"}
+
+
+def slice_period(hist, period):
+    """Return the trailing `period` of bars from a longer history."""
+    if hist.empty or period == "max":
+        return hist
+
+    if period.endswith("d"):
+        # Day periods count trading sessions, like yfinance does
+        sessions = hist.index.normalize().unique()
+        n = int(period[:-1])
+        if len(sessions) <= n:
+            return hist
+        return hist[hist.index >= sessions[-n]]
+
+    if period.endswith("mo"):
+        offset = pd.DateOffset(months=int(period[:-2]))
+    elif period.endswith("y"):
+        offset = pd.DateOffset(years=int(period[:-1]))
+    else:
+        return hist
+
+    start = hist.index[-1] - offset
+    return hist[hist.index > start]
+
+
+def get_ohlcv(ticker: str, period: str = "1y", interval: str = "1d"):
+    """
+    Get OHLCV bars from the shared history store.
+    Fetches the longest period needed for the interval once and serves
+    shorter periods as slices of it.
+    """
+    key = (ticker, interval)
+    with ohlcv_lock:
+        entry = ohlcv_cache.get(key)
+
+    if entry is None or not covers_period(entry["period"], period):
+        hist, fetch_period = refresh_history(ticker, fetch_period_for(period, interval), interval)
+        entry = {"period": fetch_period, "data": hist}
+        with ohlcv_lock:
+            ohlcv_cache[key] = entry
+
+    return slice_period(entry["data"], period)
+
+
+async def get_ohlcv_async(ticker: str, period: str = "1y", interval: str = "1d"):
+    """get_ohlcv for async callers; upstream goes through the async provider."""
+    key = (ticker, interval)
+    with ohlcv_lock:
+        entry = ohlcv_cache.get(key)
+
+    if entry is None or not covers_period(entry["period"], period):
+        hist, fetch_period = await refresh_history_async(ticker, fetch_period_for(period, interval), interval)
+        entry = {"period": fetch_period, "data": hist}
+        with ohlcv_lock:
+            ohlcv_cache[key] = entry
+
+    return slice_period(entry["data"], period)
+
+
+async def prefetch_ohlcv(tickers, period, interval="1d"):
+    """Warm the shared history store for many tickers with concurrent fetches."""
+    await asyncio.gather(
+        *(get_ohlcv_async(ticker, period, interval) for ticker in dict.fromkeys(tickers)),
+        return_exceptions=True,
+    )
+
+
+def covers_period(stored_period, period):
+    """True if a series fetched for `stored_period` also covers `period`."""
+    return PERIOD_DAYS.get(stored_period, 0) >= PERIOD_DAYS.get(period, 0)
+
+
+def fetch_period_for(period, interval):
+    """Period to actually download: the interval's prefetch period, or longer if asked."""
+    fetch_period = PREFETCH_PERIOD.get(interval, period)
+    return fetch_period if covers_period(fetch_period, period) else period
+
+
+# On-disk bar store, one memory-mapped .npy file (plus a small .json sidecar)
+# per (ticker, interval). Survives restarts, so a cold start only fetches the
+# bars after the last stored one.
+HISTORY_STORE_DIR = os.environ.get(
+    "HISTORY_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history_store")
+)
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+HISTORY_DTYPE = np.dtype([("ts", "i8")] + [(field, "f8") for field in OHLCV_FIELDS])
+
+
+def history_store_path(ticker, interval):
+    """Base path (without extension) of the stored bars for a ticker/interval."""
+    name = f"{urllib.parse.quote(ticker, safe='')}_{interval}"
+    return os.path.join(HISTORY_STORE_DIR, name)
+
+
+def load_stored_history(ticker, interval):
+    """Load stored bars as (DataFrame, meta), or (None, None) if nothing is stored."""
+    path = history_store_path(ticker, interval)
+    try:
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        bars = np.load(path + ".npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None, None
+
+    index = pd.to_datetime(np.asarray(bars["ts"]), unit="ns", utc=True).tz_convert(meta["tz"])
+    data = pd.DataFrame({field: np.asarray(bars[field]) for field in OHLCV_FIELDS}, index=index)
+    return data, meta
+
+
+def save_history(ticker, interval, data, period):
+    """Write bars to the store atomically, replacing what was there."""
+    os.makedirs(HISTORY_STORE_DIR, exist_ok=True)
+    path = history_store_path(ticker, interval)
+
+    bars = np.empty(len(data), dtype=HISTORY_DTYPE)
+    bars["ts"] = data.index.as_unit("ns").asi8
+    for field in OHLCV_FIELDS:
+        bars[field] = data[field].to_numpy(dtype=float)
+    meta = {"period": period, "tz": str(data.index.tz or "UTC")}
+
+    # Unique temp names, so concurrent refreshes of one ticker never share a file
+    temp_paths = []
+    try:
+        with tempfile.NamedTemporaryFile(dir=HISTORY_STORE_DIR, suffix=".npy.tmp", delete=False) as f:
+            temp_paths.append(f.name)
+            np.save(f, bars)
+        with tempfile.NamedTemporaryFile("w", dir=HISTORY_STORE_DIR, suffix=".json.tmp", delete=False) as f:
+            temp_paths.append(f.name)
+            json.dump(meta, f)
+        os.replace(temp_paths[0], path + ".npy")
+        os.replace(temp_paths[1], path + ".json")
+    finally:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def stored_history_for(ticker, period, interval):
+    """
+    Stored bars that can be delta-refreshed to serve `period`, and the period
+    they cover; (None, period) if a full download is needed.
+    """
+    stored, meta = load_stored_history(ticker, interval)
+    if stored is not None and not stored.empty and covers_period(meta["period"], period):
+        return stored, meta["period"]
+    return None, period
+
+
+def refresh_start(stored):
+    """
+    Where a delta refresh starts: the bar before the last stored one, so the
+    refetch includes a completed bar to check against the stored copy.
+    """
+    return stored.index[max(len(stored) - 2, 0)]
 
 
-@cached(cache=market_status_cache)
+def history_matches(stored, new):
+    """
+    False if refetched bars no longer match the stored ones, meaning a split
+    or dividend has back-adjusted the whole series since it was stored. The
+    last stored bar may have been incomplete, so it is not compared.
+    """
+    overlap = stored.index[:-1].intersection(new.index)
+    if overlap.empty:
+        return True
+    return bool(np.allclose(
+        new.loc[overlap, "Close"].to_numpy(dtype=float),
+        stored.loc[overlap, "Close"].to_numpy(dtype=float),
+        rtol=ADJUSTMENT_TOLERANCE, atol=0, equal_nan=True,
+    ))
+
+
+def merge_history(ticker, interval, stored, new, period):
+    """Merge newly fetched bars over the stored ones, trim to `period` and persist."""
+    if new.empty:
+        return stored if stored is not None else new
+
+    new = new[OHLCV_FIELDS]
+    hist = new if stored is None else pd.concat([stored[stored.index < new.index[0]], new])
+
+    # Drop bars that have aged out of the period we keep
+    hist = slice_period(hist, period)
+    try:
+        save_history(ticker, interval, hist, period)
+    except OSError as e:
+        print(f"Error saving history for {ticker}: {e}")
+    return hist
+
+
+@async_single_flight("history")
+async def refresh_history_async(ticker, period, interval):
+    """
+    Bring the stored bars for (ticker, interval) up to date and return
+    (bars, period covered). Only bars from the last stored one onwards are
+    fetched; the last stored bar is refetched as it may have been incomplete.
+    If the stored bars have since been adjusted upstream the whole period is
+    downloaded again. Store reads and writes run in a worker thread, so a
+    prefetch of many tickers doesn't block the event loop on disk I/O.
+    """
+    stored, period = await asyncio.to_thread(stored_history_for, ticker, period, interval)
+
+    if stored is not None:
+        try:
+            new = await fetch_history_async(ticker, interval, start=refresh_start(stored).normalize())
+        except Exception as e:
+            print(f"Error refreshing history for {ticker}: {e}")
+            return stored, period
+        if not history_matches(stored, new):
+            print(f"Stored history for {ticker} was adjusted upstream, fetching {period} again")
+            stored = None
+
+    if stored is None:
+        new = await fetch_history_async(ticker, interval, period=period)
+
+    return await asyncio.to_thread(merge_history, ticker, interval, stored, new, period), period
+
+
+def refresh_history(ticker, period, interval):
+    """
+    refresh_history_async for sync callers. Every history download goes
+    through the one async provider, so all stored bars share its adjustment.
+    """
+    return run_provider(refresh_history_async(ticker, period, interval))
+
+
+# The stock.info fields any endpoint reads. Only these are kept in
+# fundamentals_cache; the full payload has well over a hundred keys.
+FUNDAMENTAL_FIELDS = (
+    # Profile
+    "longName", "sector", "industry", "beta", "marketCap",
+    # Price
+    "currentPrice", "regularMarketPrice",
+    # Valuation
+    "trailingPE", "forwardPE", "pegRatio", "priceToBook", "priceToSales",
+    # Per share
+    "trailingEps", "bookValue", "sharesOutstanding", "dividendYield",
+    # Profitability and efficiency
+    "grossMargins", "operatingMargins", "profitMargins",
+    "returnOnEquity", "returnOnAssets", "assetTurnover",
+    # Financial health
+    "currentRatio", "quickRatio", "debtToEquity", "totalDebt", "cashAndCashEquivalents",
+    # Growth and cash flow
+    "revenueGrowth", "earningsGrowth", "freeCashflow", "operatingCashflow",
+)
+
+
+@cached(cache=fundamentals_cache, lock=fundamentals_lock)
+@single_flight("fundamentals")
+def get_fundamentals(ticker: str):
+    """
+    Get the projected stock.info fields for a ticker from the shared cache.
+    Missing fields stay missing, so `.get(key, default)` behaves as before.
+    """
+    info = yf.Ticker(ticker).info
+    return {field: info[field] for field in FUNDAMENTAL_FIELDS if field in info}
+
+
+# Fan-out defaults for slow per-ticker upstream calls
+FAN_OUT_WORKERS = 16
+FAN_OUT_TIMEOUT = 20  # seconds per task, counted from when it starts running
+
+
+def fan_out(tasks, max_workers=FAN_OUT_WORKERS, timeout=FAN_OUT_TIMEOUT):
+    """
+    Run independent zero-argument callables concurrently.
+    `tasks` maps a key to a callable. Returns (results, errors): results maps
+    each successful key to its return value, errors maps each failed or
+    timed-out key to a message. One slow or failing task never fails the batch.
+    """
+    results, errors = {}, {}
+    if not tasks:
+        return results, errors
+
+    started = {}
+
+    def run(key, fn):
+        started[key] = monotonic()
+        return fn()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks))))
+    futures = {executor.submit(run, key, fn): key for key, fn in tasks.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    errors[key] = str(e) or type(e).__name__
+
+            # Give up on tasks that have been running too long. The thread
+            # can't be killed, but the batch no longer waits for it.
+            now = monotonic()
+            for future in list(pending):
+                key = futures[future]
+                if key in started and now - started[key] > timeout:
+                    errors[key] = f"Timed out after {timeout}s"
+                    pending.discard(future)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, errors
+
+
+# Async data providers
+# One pooled HTTP client serves quotes, history and news for every request,
+# so a single worker can keep hundreds of upstream requests in flight
+# without tying up a thread for each.
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{}"
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search"
+PROVIDER_MAX_CONNECTIONS = 100
+# stock.info needs yfinance's cookie/crumb handshake, so fundamentals run on
+# their own thread pool rather than Starlette's
+provider_executor = ThreadPoolExecutor(max_workers=32)
+http_client = None
+# Loop the providers run on: the server's, or a background one outside it
+provider_loop = None
+provider_loop_lock = Lock()
+
+
+def get_http_client():
+    """Shared pooled AsyncClient, created on first use."""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, pool=30.0),
+            limits=httpx.Limits(max_connections=PROVIDER_MAX_CONNECTIONS, max_keepalive_connections=20),
+            headers={"User-Agent": "Mozilla/5.0"},
+            follow_redirects=True,
+        )
+    return http_client
+
+
+def get_provider_loop():
+    """The server's event loop, or a background loop started on first use without a server."""
+    global provider_loop
+    with provider_loop_lock:
+        if provider_loop is None or provider_loop.is_closed():
+            provider_loop = asyncio.new_event_loop()
+            Thread(target=provider_loop.run_forever, name="providers", daemon=True).start()
+        return provider_loop
+
+
+def run_provider(coro):
+    """Run a provider coroutine from sync code in a worker thread and return its result."""
+    loop = get_provider_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_provider would block the provider loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def close_providers():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+    provider_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def fetch_yahoo_chart(ticker, **params):
+    """Fetch one result from Yahoo's chart API."""
+    response = await get_http_client().get(
+        YAHOO_CHART_URL.format(urllib.parse.quote(ticker, safe="")), params=params
+    )
+    response.raise_for_status()
+    chart = response.json()["chart"]
+    if chart.get("error"):
+        raise ValueError(chart["error"].get("description", "Chart request failed"))
+    return chart["result"][0]
+
+
+async def fetch_history_async(ticker, interval="1d", period=None, start=None):
+    """
+    Fetch OHLCV bars for a period (e.g. "2y") or from a start timestamp,
+    in the same shape yfinance's history() returns.
+    """
+    params = {"interval": interval, "includeAdjustedClose": "true"}
+    if start is not None:
+        params["period1"] = int(start.timestamp())
+        params["period2"] = int(datetime.now().timestamp())
+    else:
+        params["range"] = period
+    result = await fetch_yahoo_chart(ticker, **params)
+
+    timestamps = result.get("timestamp") or []
+    if not timestamps:
+        return pd.DataFrame(columns=OHLCV_FIELDS)
+
+    quote = result["indicators"]["quote"][0]
+    tz = result["meta"].get("exchangeTimezoneName", "UTC")
+    index = pd.to_datetime(timestamps, unit="s", utc=True).tz_convert(tz)
+    data = pd.DataFrame(
+        {field: np.array(quote[field.lower()], dtype=float) for field in OHLCV_FIELDS}, index=index
+    )
+
+    # Match yfinance's auto_adjust: scale OHLC by adjusted close / close
+    adjclose = result["indicators"].get("adjclose")
+    if adjclose:
+        ratio = np.array(adjclose[0]["adjclose"], dtype=float) / data["Close"].to_numpy()
+        for field in ("Open", "High", "Low", "Close"):
+            data[field] *= ratio
+
+    # yfinance stamps daily and longer bars at midnight exchange time
+    if not interval.endswith(("m", "h")):
+        data.index = data.index.normalize()
+    return data.dropna(subset=["Close"])
+
+
+@async_single_flight("chart_meta")
+async def fetch_chart_meta(ticker):
+    """
+    Latest price, previous close, day and 52-week range, currency and name
+    for one ticker, from the meta block of a one-day chart request.
+    """
+    return (await fetch_yahoo_chart(ticker, range="1d", interval="1d"))["meta"]
+
+
+def estimated_market_cap(price, fundamentals):
+    """Market cap at `price` from shares outstanding, else the reported one."""
+    shares = fundamentals.get("sharesOutstanding")
+    return price * shares if shares else fundamentals.get("marketCap")
+
+
+async def fetch_quote_async(ticker):
+    """Fetch the lightweight dashboard quote for one ticker."""
+    meta = await fetch_chart_meta(ticker)
+    price = meta["regularMarketPrice"]
+    prev_close = meta.get("chartPreviousClose") or meta.get("previousClose")
+    change = price - prev_close
+    p_change = (change / prev_close) * 100 if prev_close else 0
+
+    # Market cap only if fundamentals are already cached; never fetch them here
+    with fundamentals_lock:
+        fundamentals = fundamentals_cache.get(hashkey(ticker)) or {}
+    market_cap = estimated_market_cap(price, fundamentals)
+
+    # For batch view (dashboard) we skip heavy 'info' like sector/beta,
+    # /batch-analytics serves those for the Analytics tab.
+    return {
+        "symbol": ticker,
+        "price": price,
+        "change": change,
+        "percentChange": p_change,
+        "marketCap": market_cap,
+        "currency": meta.get("currency"),
+    }
+
+
+async def fetch_fundamentals_async(ticker):
+    """get_fundamentals without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(provider_executor, get_fundamentals, ticker)
+
+
+@cached(cache=market_status_cache, lock=market_status_lock)
 def get_market_status():
     """
     Check if NSE is open.
-    NSE Market hours: 09:15 to 15:30 IST, Mon-Fri.
+    NSE Market hours: 09:15 to 15:30 IST, Mon-Fri, except exchange holidays.
     """
-    ist = pytz.timezone("Asia/Kolkata")
-    now = datetime.now(ist)
+    now = datetime.now(IST)
+    next_open = next_session_open(now).isoformat()
 
     # Check for weekends
     if now.weekday() >= 5:  # 5=Saturday, 6=Sunday
-        return {"isOpen": False, "message": "Market Closed (Weekend)"}
+        return {"isOpen": False, "message": "Market Closed (Weekend)", "nextOpen": next_open}
+
+    if now.date() in MARKET_HOLIDAYS:
+        return {"isOpen": False, "message": "Market Closed (Holiday)", "nextOpen": next_open}
 
     # Market hours
-    market_open = time(9, 15)
-    market_close = time(15, 30)
     current_time = now.time()
 
-    if market_open <= current_time <= market_close:
+    if MARKET_OPEN <= current_time <= MARKET_CLOSE:
         return {"isOpen": True, "message": "Market Open"}
     else:
-        return {"isOpen": False, "message": "Market Closed"}
+        return {"isOpen": False, "message": "Market Closed", "nextOpen": next_open}
 
 
 @app.get("/")
@@ -67,15 +1020,31 @@ def market_status():
     return get_market_status()
 
 
+@app.get("/cache-stats")
+def cache_stats():
+    """Upstream calls made vs. deduplicated by single-flight, per call site."""
+    return {"single_flight": {name: flight.stats() for name, flight in single_flights.items()}}
+
+
 # News Cache (longer TTL as news doesn't change every second)
-news_cache = TTLCache(maxsize=200, ttl=1800)
+# Per-ticker headline feeds, shared by /news and /portfolio-news
+news_cache = TTLCache(maxsize=500, ttl=1800)
+TICKER_NEWS_LIMIT = 10
+PORTFOLIO_NEWS_PER_TICKER = 5  # Fewer per ticker to avoid overload
 
 
-def fetch_google_news(query: str, limit: int = 10):
+async def fetch_google_news(query: str, limit: int = 10):
     """Internal helper to fetch news via RSS."""
-    encoded_query = urllib.parse.quote(query)
-    url = f"https://news.google.com/rss/search?q={encoded_query}&hl=en-IN&gl=IN&ceid=IN:en"
-    feed = feedparser.parse(url)
+    try:
+        response = await get_http_client().get(
+            GOOGLE_NEWS_RSS_URL, params={"q": query, "hl": "en-IN", "gl": "IN", "ceid": "IN:en"}
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        # An unavailable or rate-limited feed reads as no news, not an error
+        print(f"Error fetching news for {query}: {e}")
+        return []
+    feed = feedparser.parse(response.content)
 
     results = []
     for entry in feed.entries[:limit]:
@@ -96,50 +1065,91 @@ def fetch_google_news(query: str, limit: int = 10):
     return results
 
 
-def analyze_sentiment(news_list):
-    """Calculate average sentiment from headlines using VADER."""
-    if not news_list:
-        return {"score": 0, "label": "Neutral", "detail": "Insufficient data"}
-
-    analyzer = SentimentIntensityAnalyzer()
-    scores = []
-    
+@async_cached(news_cache)
+@async_single_flight("news")
+async def get_ticker_news(ticker):
+    """Latest headlines for one ticker, tagged with the ticker for the frontend."""
+    news_list = await fetch_google_news(ticker, limit=TICKER_NEWS_LIMIT)
     for item in news_list:
-        # VADER returns compound score from -1 (most negative) to +1 (most positive)
-        vs = analyzer.polarity_scores(item["title"])
-        compound = vs["compound"]
-        
-        # Financial keyword adjustments for more accurate sentiment
-        title_lower = item["title"].lower()
-        
-        # Strong negative financial keywords
-        negative_keywords = ['fall', 'drop', 'crash', 'plunge', 'slump', 'decline', 'loss', 'sell-off', 'bearish', 'fraud', 'scandal', 'investigation', 'debt', 'bankruptcy']
-        # Strong positive financial keywords  
-        positive_keywords = ['surge', 'rally', 'jump', 'soar', 'bullish', 'profit', 'gain', 'dividend', 'buyback', 'merger', 'acquisition', 'growth', 'beat', 'record']
-        
-        # Apply keyword weighting
-        keyword_adjustment = 0
-        for keyword in negative_keywords:
-            if keyword in title_lower:
-                keyword_adjustment -= 0.15
-        for keyword in positive_keywords:
-            if keyword in title_lower:
-                keyword_adjustment += 0.10
-        
-        # Apply market-specific adjustments
-        # Fear Bias: Market reacts 2-3x harder to bad news than good news (financial psychology)
-        if compound < 0:
-            amplified = compound * 2.2  # Stronger fear amplification
-        else:
-            amplified = compound * 1.1  # Minimal positive amplification
-        
-        # Add keyword adjustment
-        final_score = amplified + keyword_adjustment
-        
-        scores.append(max(-1, min(1, final_score)))
+        item["ticker"] = ticker
+    return news_store.ingest(ticker, news_list)
+
+
+def published_timestamp(item):
+    """Epoch seconds of an item's RSS pubDate, 0 if it can't be parsed."""
+    try:
+        return parsedate_to_datetime(item["published"]).timestamp()
+    except (TypeError, ValueError, KeyError):
+        return 0
+
+
+# Headline sentiment
+# VADER loads its lexicon on construction, so one analyzer serves the process
+sentiment_analyzer = SentimentIntensityAnalyzer()
+
+# Financial keyword adjustments for more accurate sentiment
+# Strong negative financial keywords
+NEGATIVE_KEYWORDS = ('fall', 'drop', 'crash', 'plunge', 'slump', 'decline', 'loss', 'sell-off', 'bearish', 'fraud', 'scandal', 'investigation', 'debt', 'bankruptcy')
+# Strong positive financial keywords
+POSITIVE_KEYWORDS = ('surge', 'rally', 'jump', 'soar', 'bullish', 'profit', 'gain', 'dividend', 'buyback', 'merger', 'acquisition', 'growth', 'beat', 'record')
+KEYWORD_WEIGHTS = {
+    **{keyword: -0.15 for keyword in NEGATIVE_KEYWORDS},
+    **{keyword: 0.10 for keyword in POSITIVE_KEYWORDS},
+}
+# One scan per headline; the lookahead also finds keywords that overlap
+KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(KEYWORD_WEIGHTS, key=len, reverse=True))) + "))"
+)
+
+# Final per-headline scores, keyed by a hash of the normalized headline
+headline_scores = LRUCache(maxsize=20000)
+headline_scores_lock = Lock()
+
 
-    avg_score = sum(scores) / len(scores)
+def headline_key(title):
+    """Cache key for a headline: hash of the title with whitespace collapsed."""
+    # Case is kept, VADER scores capitalised words higher
+    return hashlib.blake2b(" ".join(title.split()).encode(), digest_size=16).digest()
 
+
+def score_headline(title):
+    """Fear-weighted, keyword-adjusted VADER score of one headline, in [-1, 1]."""
+    # VADER returns compound score from -1 (most negative) to +1 (most positive)
+    compound = sentiment_analyzer.polarity_scores(title)["compound"]
+
+    # Apply keyword weighting, each keyword counts once
+    keyword_adjustment = sum(
+        KEYWORD_WEIGHTS[keyword] for keyword in set(KEYWORD_PATTERN.findall(title.lower()))
+    )
+
+    # Apply market-specific adjustments
+    # Fear Bias: Market reacts 2-3x harder to bad news than good news (financial psychology)
+    if compound < 0:
+        amplified = compound * 2.2  # Stronger fear amplification
+    else:
+        amplified = compound * 1.1  # Minimal positive amplification
+
+    # Add keyword adjustment
+    return max(-1, min(1, amplified + keyword_adjustment))
+
+
+def score_headlines(titles):
+    """Scores for a batch of headlines; each distinct headline is scored once."""
+    keys = [headline_key(title) for title in titles]
+    with headline_scores_lock:
+        known = {key: headline_scores[key] for key in keys if key in headline_scores}
+
+    missing = {key: title for key, title in zip(keys, titles) if key not in known}
+    scored = {key: score_headline(title) for key, title in missing.items()}
+    with headline_scores_lock:
+        headline_scores.update(scored)
+
+    known.update(scored)
+    return np.array([known[key] for key in keys], dtype=float)
+
+
+def sentiment_label(avg_score):
+    """(label, detail) for an average headline score."""
     # VADER thresholds (stricter for financial sentiment analysis)
     if avg_score > 0.15:
         label = "Bullish"
@@ -157,23 +1167,146 @@ def analyze_sentiment(news_list):
         label = "Neutral"
         detail = "Mixed news flow. No strong directional bias detected."
 
-    return {"score": avg_score, "label": label, "detail": detail}
+    return label, detail
+
+
+# News ingestion
+NEWS_SENTIMENT_HALF_LIFE = 3 * 86400  # seconds for an article's weight to halve
+NEWS_DECAY_RATE = np.log(2) / NEWS_SENTIMENT_HALF_LIFE
+NEWS_STORE_MAX_ARTICLES = 2000  # remembered articles per ticker
+NO_SENTIMENT = {"score": 0, "label": "Neutral", "detail": "Insufficient data"}
+
+
+def normalized_headline(title):
+    """Headline reduced to lowercase words, so syndicated copies compare equal."""
+    return " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+class TickerNewsAggregate:
+    """
+    Running sentiment for one ticker's articles. The decayed score weights
+    each article by exp(-rate * age) relative to the newest article seen;
+    both sums share that reference, so later rescaling cancels out.
+    """
+
+    def __init__(self):
+        self.seen = LRUCache(maxsize=NEWS_STORE_MAX_ARTICLES)
+        self.count = 0
+        self.total = 0.0
+        self.decayed_sum = 0.0
+        self.decayed_weight = 0.0
+        self.reference_time = None
+
+    def add(self, score, published):
+        self.count += 1
+        self.total += score
+
+        if self.reference_time is None:
+            self.reference_time = published
+        elif published > self.reference_time:
+            factor = np.exp(-NEWS_DECAY_RATE * (published - self.reference_time))
+            self.decayed_sum *= factor
+            self.decayed_weight *= factor
+            self.reference_time = published
+
+        weight = np.exp(-NEWS_DECAY_RATE * (self.reference_time - published))
+        self.decayed_sum += weight * score
+        self.decayed_weight += weight
+
+
+class NewsStore:
+    """
+    Articles seen per ticker, deduplicated by link and by normalized headline,
+    with running sentiment aggregates updated only for new articles.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.tickers = LRUCache(maxsize=maxsize)
+        self.lock = Lock()
+
+    def ingest(self, ticker, news_list):
+        """
+        Record a freshly fetched feed and return it without syndicated
+        duplicates. Only articles not seen before are scored.
+        """
+        with self.lock:
+            aggregate = self.tickers.get(ticker)
+            if aggregate is None:
+                aggregate = self.tickers[ticker] = TickerNewsAggregate()
+
+            unique, new = [], []
+            in_feed = set()
+            for item in news_list:
+                keys = ("link", item["link"]), ("title", normalized_headline(item["title"]))
+                if any(key in in_feed for key in keys):
+                    continue
+                in_feed.update(keys)
+                unique.append(item)
+                if not any(key in aggregate.seen for key in keys):
+                    new.append(item)
+                for key in keys:
+                    aggregate.seen[key] = True
+
+            if new:
+                now = datetime.now().timestamp()
+                scores = score_headlines([item["title"] for item in new])
+                for item, score in zip(new, scores):
+                    aggregate.add(float(score), published_timestamp(item) or now)
+        return unique
+
+    def sentiment(self, *tickers):
+        """Decayed sentiment across tickers, read from the running aggregates."""
+        with self.lock:
+            aggregates = [
+                self.tickers[t] for t in tickers if t in self.tickers and self.tickers[t].count
+            ]
+            if not aggregates:
+                return dict(NO_SENTIMENT)
+
+            # Bring every ticker's sums to the newest reference time before combining
+            reference = max(a.reference_time for a in aggregates)
+            decayed_sum = decayed_weight = 0.0
+            for a in aggregates:
+                factor = np.exp(-NEWS_DECAY_RATE * (reference - a.reference_time))
+                decayed_sum += a.decayed_sum * factor
+                decayed_weight += a.decayed_weight * factor
+            count = sum(a.count for a in aggregates)
+            total = sum(a.total for a in aggregates)
+
+        # Every weight can underflow to zero if all articles are very old
+        if not decayed_weight > 0:
+            return dict(NO_SENTIMENT)
+        score = float(decayed_sum / decayed_weight)
+        label, detail = sentiment_label(score)
+        return {
+            "score": score,
+            "label": label,
+            "detail": detail,
+            "articles": count,
+            "averageScore": total / count,
+        }
+
+
+news_store = NewsStore()
 
 
 @app.get("/indices")
-@cached(cache=quotes_cache)
-def get_indices():
+@swr_cached(quotes_cache)
+@async_single_flight("indices")
+async def get_indices():
     """Fetch Nifty 50 and Sensex data."""
     tickers = [("^NSEI", "Nifty 50"), ("^BSESN", "Sensex")]
+    metas = await asyncio.gather(
+        *(fetch_chart_meta(symbol) for symbol, _ in tickers), return_exceptions=True
+    )
     indices = []
 
-    for symbol, name in tickers:
+    for (symbol, name), meta in zip(tickers, metas):
         try:
-            t = yf.Ticker(symbol)
-            info = t.fast_info
-
-            price = info.last_price
-            prev_close = info.previous_close
+            if isinstance(meta, BaseException):
+                raise meta
+            price = meta["regularMarketPrice"]
+            prev_close = meta.get("chartPreviousClose") or meta.get("previousClose")
             change = price - prev_close
             p_change = (change / prev_close) * 100 if prev_close else 0
 
@@ -194,22 +1327,22 @@ def get_indices():
 
 
 @app.get("/quote/{ticker}")
-@cached(cache=quotes_cache)
-def get_quote(ticker: str):
+@swr_cached(quotes_cache)
+@async_single_flight("quote")
+async def get_quote(ticker: str):
     """Get live quote for a single ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.fast_info
+        # Sector/beta/name come from the shared fundamentals cache
+        meta, main_info = await asyncio.gather(
+            fetch_chart_meta(ticker), fetch_fundamentals_async(ticker)
+        )
 
         # Safe retrieval with defaults
-        price = info.last_price if info.last_price else 0.0
-        prev_close = info.previous_close if info.previous_close else price
+        price = meta.get("regularMarketPrice") or 0.0
+        prev_close = meta.get("chartPreviousClose") or meta.get("previousClose") or price
         change = price - prev_close
         p_change = (change / prev_close) * 100 if prev_close != 0 else 0.0
 
-        # Fetch extra info safely (slower, so we might want to cache this in frontend or DB in real app)
-        # For now, we fetch it live.
-        main_info = stock.info
         sector = main_info.get("sector", "Unknown")
         beta = main_info.get("beta", 1.0)  # Default to 1 (market correlation)
         long_name = main_info.get("longName", ticker)
@@ -220,76 +1353,221 @@ def get_quote(ticker: str):
             "price": price,
             "change": change,
             "percentChange": p_change,
-            "dayHigh": info.day_high,
-            "dayLow": info.day_low,
-            "yearHigh": info.year_high,
-            "yearLow": info.year_low,
-            "marketCap": info.market_cap,
+            "dayHigh": meta.get("regularMarketDayHigh"),
+            "dayLow": meta.get("regularMarketDayLow"),
+            "yearHigh": meta.get("fiftyTwoWeekHigh"),
+            "yearLow": meta.get("fiftyTwoWeekLow"),
+            "marketCap": estimated_market_cap(price, main_info),
             "sector": sector,
             "beta": beta,
-            "currency": info.currency,
+            "currency": meta.get("currency"),
         }
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Ticker {ticker} not found: {e}")
 
 
+# Per-symbol dashboard quotes, filled by /batch-quotes
+batch_quotes_cache = TLRUCache(maxsize=1000, ttu=market_ttu(30))
+batch_quotes_lock = Lock()
+
+
+async def refresh_quotes(tickers):
+    """
+    Fetch fresh quotes for tickers concurrently, so a batch costs about one
+    round trip, and store them in the per-symbol cache. Failed tickers are left out.
+    """
+    results = await asyncio.gather(
+        *(fetch_quote_async(ticker) for ticker in tickers), return_exceptions=True
+    )
+    fetched = {}
+    for ticker, quote in zip(tickers, results):
+        if not isinstance(quote, BaseException):
+            with batch_quotes_lock:
+                batch_quotes_cache[ticker] = quote
+            fetched[ticker] = quote
+    return fetched
+
+
 @app.post("/batch-quotes")
-def get_batch_quotes(tickers: list[str]):
+async def get_batch_quotes(tickers: list[str]):
     """Fetch quotes for multiple tickers efficiently."""
-    results = []
-    for ticker in tickers:
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.fast_info
-            price = info.last_price
-            prev_close = info.previous_close
-            change = price - prev_close
-            p_change = (change / prev_close) * 100 if prev_close else 0
+    quotes = {}
+    missing = []
+    for ticker in dict.fromkeys(tickers):
+        with batch_quotes_lock:
+            cached_quote = batch_quotes_cache.get(ticker)
+        if cached_quote is not None:
+            quotes[ticker] = cached_quote
+        else:
+            missing.append(ticker)
 
-            # For batch view (dashboard), we generally don't need heavy 'info' like sector/beta
-            # unless we are doing analytics. To keep dashboard fast, we might skip sector/beta here
-            # OR we can try to fetch it if it's cached/fast.
-            # 'stock.info' triggers a web request per stock.
-            # Optimization: distinct endpoint for analytics data?
-            # For now, let's include basic info.
+    quotes.update(await refresh_quotes(missing))
 
-            results.append(
-                {
-                    "symbol": ticker,
-                    "price": price,
-                    "change": change,
-                    "percentChange": p_change,
-                    "marketCap": info.market_cap,
-                    "currency": info.currency,
-                }
-            )
-        except:
-            results.append({"symbol": ticker, "error": "Failed to fetch"})
-    return results
+    return [
+        quotes.get(ticker, {"symbol": ticker, "error": "Failed to fetch"})
+        for ticker in tickers
+    ]
+
+
+# Quote streaming
+QUOTE_STREAM_INTERVAL = 15  # seconds between upstream refreshes
+QUOTE_STREAM_KEEPALIVE = 20  # seconds of silence before a keepalive comment
+
+
+class QuoteStreamHub:
+    """
+    Push quotes to streaming subscribers. A single poller refreshes the union
+    of all subscribed symbols once per tick and sends each subscriber only
+    the quotes that changed, so upstream cost follows distinct symbols,
+    not connected clients.
+    """
+
+    def __init__(self, interval=QUOTE_STREAM_INTERVAL):
+        self.interval = interval
+        self.subscribers = {}  # queue -> set of symbols
+        self.latest = {}  # symbol -> last quote pushed
+        self.wakeup = None
+        self.task = None
+
+    def symbols(self):
+        return set().union(*self.subscribers.values()) if self.subscribers else set()
+
+    def subscribe(self, symbols):
+        """Register a subscriber and return the queue its updates arrive on."""
+        queue = asyncio.Queue()
+        self.subscribers[queue] = set(symbols)
+
+        # Send what we already know straight away
+        snapshot = [self.latest[s] for s in self.subscribers[queue] if s in self.latest]
+        if snapshot:
+            queue.put_nowait(snapshot)
+
+        if self.task is None or self.task.done():
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+        elif not self.subscribers[queue].issubset(self.latest):
+            # New symbols shouldn't wait for the next tick
+            self.wakeup.set()
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.pop(queue, None)
+
+    def publish(self, quotes):
+        changed = {s: q for s, q in quotes.items() if self.latest.get(s) != q}
+        self.latest.update(changed)
+        if not changed:
+            return
+
+        for queue, symbols in list(self.subscribers.items()):
+            update = [changed[s] for s in symbols if s in changed]
+            if update:
+                queue.put_nowait(update)
+
+    async def run(self):
+        next_tick = 0.0
+        while self.subscribers:
+            self.wakeup.clear()
+            subscribed = self.symbols()
+            # Forget symbols nobody follows any more
+            for symbol in list(self.latest):
+                if symbol not in subscribed:
+                    del self.latest[symbol]
+
+            # Full refresh once per tick; in between only fetch newly subscribed symbols
+            if monotonic() >= next_tick:
+                symbols = subscribed
+                next_tick = monotonic() + self.interval
+            else:
+                symbols = subscribed - self.latest.keys()
+
+            if symbols:
+                try:
+                    quotes = await refresh_quotes(sorted(symbols))
+                    self.publish(quotes)
+                except Exception as e:
+                    print(f"Error refreshing streamed quotes: {e}")
+
+            # Sleep until the next tick, or until a subscriber adds new symbols
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=max(0, next_tick - monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+
+quote_hub = QuoteStreamHub()
+
+
+@app.get("/stream/quotes")
+async def stream_quotes(request: Request, tickers: str = ""):
+    """Stream quote updates for the given tickers as Server-Sent Events."""
+    symbols = [t.strip() for t in tickers.split(",") if t.strip()]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+
+    queue = quote_hub.subscribe(symbols)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    quotes = await asyncio.wait_for(queue.get(), timeout=QUOTE_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: quotes\ndata: {encode_json(quotes).decode()}\n\n"
+        finally:
+            quote_hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
 
 
 @app.post("/batch-analytics")
-def get_batch_analytics(tickers: list[str]):
+async def get_batch_analytics(tickers: list[str]):
     """Fetch detailed analytics (Sector, Beta, Market Cap) for charts."""
+    # stock.info is slow, so fetch every ticker concurrently
+    unique = list(dict.fromkeys(tickers))
+    fetched = await asyncio.gather(
+        *(asyncio.wait_for(fetch_fundamentals_async(ticker), FAN_OUT_TIMEOUT) for ticker in unique),
+        return_exceptions=True,
+    )
+    infos, errors = {}, {}
+    for ticker, info in zip(unique, fetched):
+        if isinstance(info, asyncio.TimeoutError):
+            errors[ticker] = f"Timed out after {FAN_OUT_TIMEOUT}s"
+        elif isinstance(info, BaseException):
+            errors[ticker] = str(info) or type(info).__name__
+        else:
+            infos[ticker] = info
+
     results = []
     for ticker in tickers:
-        try:
-            stock = yf.Ticker(ticker)
-            # This is slower, call only when needed (e.g. Analytics tab)
-            info = stock.info
-
+        if ticker not in infos:
             results.append(
                 {
                     "symbol": ticker,
-                    "sector": info.get("sector", "Unknown"),
-                    "industry": info.get("industry", "Unknown"),
-                    "beta": info.get("beta", 1.0),
-                    "marketCap": info.get("marketCap", 0),
-                    "longName": info.get("longName", ticker),
+                    "sector": "Unknown",
+                    "beta": 1.0,
+                    "error": errors.get(ticker, "Failed to fetch"),
                 }
             )
-        except:
-            results.append({"symbol": ticker, "sector": "Unknown", "beta": 1.0})
+            continue
+
+        info = infos[ticker]
+        results.append(
+            {
+                "symbol": ticker,
+                "sector": info.get("sector", "Unknown"),
+                "industry": info.get("industry", "Unknown"),
+                "beta": info.get("beta", 1.0),
+                "marketCap": info.get("marketCap", 0),
+                "longName": info.get("longName", ticker),
+            }
+        )
     return results
 
 
@@ -341,12 +1619,15 @@ def search_ticker(query: str):
 
 
 @app.get("/analysis/{ticker}")
-@cached(cache=analysis_cache)
-def get_detailed_analysis(ticker: str):
+@swr_cached(analysis_cache)
+@async_single_flight("analysis")
+async def get_detailed_analysis(ticker: str):
     """Fetch advanced fundamental and technical metrics."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        # Technicals use 1y of history
+        info, hist = await asyncio.gather(
+            fetch_fundamentals_async(ticker), get_ohlcv_async(ticker, period="1y")
+        )
 
         # Fundamentals
         fundamentals = {
@@ -358,71 +1639,56 @@ def get_detailed_analysis(ticker: str):
             "eps": info.get("trailingEps") or 0,
         }
 
-        # Technicals (fetch 1y history for calculation)
-        hist = stock.history(period="1y")
         if hist.empty:
             return {"fundamentals": fundamentals, "technicals": {}}
 
-        # Calculate SMAs
-        sma50 = hist["Close"].rolling(window=50).mean().iloc[-1]
-        sma200 = hist["Close"].rolling(window=200).mean().iloc[-1]
-
-        # Calculate RSI (14-day)
-        delta = hist["Close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs.iloc[-1]))
-
-        current_price = hist["Close"].iloc[-1]
-
-        technicals = {
-            "rsi": rsi,
-            "sma50": sma50,
-            "sma200": sma200,
-            "priceVsSMA50": ((current_price - sma50) / sma50) * 100,
-            "priceVsSMA200": ((current_price - sma200) / sma200) * 100,
-            "high52": hist["High"].max(),
-            "low52": hist["Low"].min(),
-        }
-
         return {
             "symbol": ticker,
             "companyName": info.get("longName", ticker),
             "fundamentals": fundamentals,
-            "technicals": technicals,
+            "technicals": await asyncio.to_thread(analysis_technicals, hist),
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def calculate_macd(data, fast=12, slow=26, signal=9):
-    """Calculate MACD (Moving Average Convergence Divergence)"""
-    exp1 = data['Close'].ewm(span=fast).mean()
-    exp2 = data['Close'].ewm(span=slow).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal).mean()
-    histogram = macd - signal_line
+def analysis_technicals(hist):
+    """Technicals block of /analysis from 1y of daily bars."""
+    # Calculate SMAs
+    sma50 = hist["Close"].rolling(window=50).mean().iloc[-1]
+    sma200 = hist["Close"].rolling(window=200).mean().iloc[-1]
+
+    # Calculate RSI (14-day)
+    rsi = calculate_rsi(hist)
+
+    current_price = hist["Close"].iloc[-1]
+
     return {
-        "macd": macd.iloc[-1],
-        "signal": signal_line.iloc[-1],
-        "histogram": histogram.iloc[-1],
-        "trend": "bullish" if macd.iloc[-1] > signal_line.iloc[-1] else "bearish"
+        "rsi": rsi,
+        "sma50": sma50,
+        "sma200": sma200,
+        "priceVsSMA50": ((current_price - sma50) / sma50) * 100,
+        "priceVsSMA200": ((current_price - sma200) / sma200) * 100,
+        "high52": hist["High"].max(),
+        "low52": hist["Low"].min(),
     }
 
 
-def calculate_bollinger_bands(data, period=20, std_dev=2):
-    """Calculate Bollinger Bands"""
-    sma = data['Close'].rolling(window=period).mean()
-    std = data['Close'].rolling(window=period).std()
-    upper_band = sma + (std * std_dev)
-    lower_band = sma - (std * std_dev)
-    
-    current_price = data['Close'].iloc[-1]
-    current_sma = sma.iloc[-1]
-    current_upper = upper_band.iloc[-1]
-    current_lower = lower_band.iloc[-1]
-    
+def macd_summary(macd, signal_line):
+    """Build the MACD response from the latest MACD and signal values"""
+    return {
+        "macd": macd,
+        "signal": signal_line,
+        "histogram": macd - signal_line,
+        "trend": "bullish" if macd > signal_line else "bearish"
+    }
+
+
+def bollinger_summary(current_price, current_sma, current_std, std_dev=2):
+    """Build the Bollinger Bands response from the latest SMA and std"""
+    current_upper = current_sma + (current_std * std_dev)
+    current_lower = current_sma - (current_std * std_dev)
+
     # Determine position relative to bands
     if current_price > current_upper:
         position = "above_upper"  # Potentially overbought
@@ -430,10 +1696,10 @@ def calculate_bollinger_bands(data, period=20, std_dev=2):
         position = "below_lower"  # Potentially oversold
     else:
         position = "within_bands"
-    
+
     # Calculate bandwidth (volatility measure)
     bandwidth = (current_upper - current_lower) / current_sma * 100
-    
+
     return {
         "upper": current_upper,
         "middle": current_sma,
@@ -444,17 +1710,8 @@ def calculate_bollinger_bands(data, period=20, std_dev=2):
     }
 
 
-def calculate_stochastic(data, k_period=14, d_period=3):
-    """Calculate Stochastic Oscillator"""
-    low_min = data['Low'].rolling(window=k_period).min()
-    high_max = data['High'].rolling(window=k_period).max()
-    
-    k_percent = ((data['Close'] - low_min) / (high_max - low_min)) * 100
-    d_percent = k_percent.rolling(window=d_period).mean()
-    
-    current_k = k_percent.iloc[-1]
-    current_d = d_percent.iloc[-1]
-    
+def stochastic_summary(current_k, current_d):
+    """Build the Stochastic response from the latest %K and %D"""
     # Determine signal
     if current_k > 80 and current_d > 80:
         signal = "overbought"
@@ -464,7 +1721,7 @@ def calculate_stochastic(data, k_period=14, d_period=3):
         signal = "bullish_crossover"
     else:
         signal = "bearish_crossover"
-    
+
     return {
         "k": current_k,
         "d": current_d,
@@ -472,14 +1729,8 @@ def calculate_stochastic(data, k_period=14, d_period=3):
     }
 
 
-def calculate_williams_r(data, period=14):
-    """Calculate Williams %R"""
-    high_max = data['High'].rolling(window=period).max()
-    low_min = data['Low'].rolling(window=period).min()
-    
-    williams_r = ((high_max - data['Close']) / (high_max - low_min)) * -100
-    current_wr = williams_r.iloc[-1]
-    
+def williams_r_summary(current_wr):
+    """Build the Williams %R response from the latest value"""
     # Determine signal
     if current_wr > -20:
         signal = "overbought"
@@ -487,48 +1738,15 @@ def calculate_williams_r(data, period=14):
         signal = "oversold"
     else:
         signal = "neutral"
-    
+
     return {
         "value": current_wr,
         "signal": signal
     }
 
 
-def calculate_adx(data, period=14):
-    """Calculate Average Directional Index (ADX)"""
-    high = data['High']
-    low = data['Low']
-    close = data['Close']
-    
-    # Calculate True Range
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    # Calculate Directional Movement
-    dm_plus = np.where((high - high.shift(1)) > (low.shift(1) - low), 
-                       np.maximum(high - high.shift(1), 0), 0)
-    dm_minus = np.where((low.shift(1) - low) > (high - high.shift(1)), 
-                        np.maximum(low.shift(1) - low, 0), 0)
-    
-    # Convert to pandas Series
-    dm_plus = pd.Series(dm_plus, index=data.index)
-    dm_minus = pd.Series(dm_minus, index=data.index)
-    
-    # Calculate Smoothed values
-    atr = tr.rolling(window=period).mean()
-    di_plus = 100 * (dm_plus.rolling(window=period).mean() / atr)
-    di_minus = 100 * (dm_minus.rolling(window=period).mean() / atr)
-    
-    # Calculate ADX
-    dx = 100 * abs(di_plus - di_minus) / (di_plus + di_minus)
-    adx = dx.rolling(window=period).mean()
-    
-    current_adx = adx.iloc[-1]
-    current_di_plus = di_plus.iloc[-1]
-    current_di_minus = di_minus.iloc[-1]
-    
+def adx_summary(current_adx, current_di_plus, current_di_minus):
+    """Build the ADX response from the latest ADX and DI values"""
     # Determine trend strength
     if current_adx > 25:
         trend_strength = "strong"
@@ -536,13 +1754,13 @@ def calculate_adx(data, period=14):
         trend_strength = "moderate"
     else:
         trend_strength = "weak"
-    
+
     # Determine trend direction
     if current_di_plus > current_di_minus:
         trend_direction = "uptrend"
     else:
         trend_direction = "downtrend"
-    
+
     return {
         "adx": current_adx,
         "di_plus": current_di_plus,
@@ -552,26 +1770,11 @@ def calculate_adx(data, period=14):
     }
 
 
-def calculate_atr(data, period=14):
-    """Calculate Average True Range (ATR)"""
-    high = data['High']
-    low = data['Low']
-    close = data['Close']
-    
-    # Calculate True Range
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    # Calculate ATR
-    atr = tr.rolling(window=period).mean()
-    current_atr = atr.iloc[-1]
-    current_price = close.iloc[-1]
-    
+def atr_summary(current_atr, current_price):
+    """Build the ATR response from the latest ATR and price"""
     # Calculate ATR as percentage of price
     atr_percent = (current_atr / current_price) * 100
-    
+
     # Determine volatility level
     if atr_percent > 3:
         volatility = "high"
@@ -579,7 +1782,7 @@ def calculate_atr(data, period=14):
         volatility = "moderate"
     else:
         volatility = "low"
-    
+
     return {
         "value": current_atr,
         "percent": atr_percent,
@@ -587,81 +1790,397 @@ def calculate_atr(data, period=14):
     }
 
 
+def calculate_rsi(data, period=14):
+    """Calculate RSI using simple rolling averages of gains and losses"""
+    delta = data["Close"].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs.iloc[-1]))
+
+
+# Streaming indicators
+# Each indicator keeps just enough state (EMA accumulators, rolling windows)
+# to fold in one new bar in constant time, and produces the same values as
+# the equivalent pandas rolling/ewm computation over the full history.
+NAN = float("nan")
+
+
+class RollingMean:
+    """Fixed-size rolling mean/std, NaN until the window is full of valid values."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.nan_count = 0
+
+    def push(self, value):
+        self.values.append(value)
+        if value != value:
+            self.nan_count += 1
+        else:
+            self.total += value
+
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            if old != old:
+                self.nan_count -= 1
+            else:
+                self.total -= old
+
+    def ready(self):
+        return len(self.values) == self.size and self.nan_count == 0
+
+    def mean(self):
+        return np.float64(self.total / self.size) if self.ready() else NAN
+
+    def std(self):
+        # Two-pass over the window; it holds at most `size` values
+        if not self.ready() or self.size < 2:
+            return NAN
+        mean = self.total / self.size
+        return np.float64(np.sqrt(sum((v - mean) ** 2 for v in self.values) / (self.size - 1)))
+
+
+class RollingExtreme:
+    """Rolling max (or min) over a fixed window using a monotonic deque."""
+
+    def __init__(self, size, find_max=True):
+        self.size = size
+        self.find_max = find_max
+        self.window = deque()  # (position, value), extreme first
+        self.position = -1
+        self.last_nan = -size
+
+    def push(self, value):
+        self.position += 1
+        if value != value:
+            self.last_nan = self.position
+        else:
+            if self.find_max:
+                while self.window and self.window[-1][1] <= value:
+                    self.window.pop()
+            else:
+                while self.window and self.window[-1][1] >= value:
+                    self.window.pop()
+            self.window.append((self.position, value))
+
+        while self.window and self.window[0][0] <= self.position - self.size:
+            self.window.popleft()
+
+    def value(self):
+        if self.position + 1 < self.size or self.position - self.last_nan < self.size:
+            return NAN
+        return self.window[0][1]
+
+
+class EMA:
+    """Exponential moving average matching pandas ewm(span=..., adjust=True)."""
+
+    def __init__(self, span):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def push(self, value):
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if value == value:
+            self.numerator += value
+            self.denominator += 1.0
+
+    def value(self):
+        return np.float64(self.numerator / self.denominator) if self.denominator else NAN
+
+
+class MACDIndicator:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, high, low, close, prev_close):
+        self.fast.push(close)
+        self.slow.push(close)
+        self.signal.push(self.fast.value() - self.slow.value())
+
+    def value(self):
+        return macd_summary(self.fast.value() - self.slow.value(), self.signal.value())
+
+
+class BollingerIndicator:
+    def __init__(self, period=20, std_dev=2):
+        self.window = RollingMean(period)
+        self.std_dev = std_dev
+        self.close = NAN
+
+    def update(self, high, low, close, prev_close):
+        self.window.push(close)
+        self.close = close
+
+    def value(self):
+        return bollinger_summary(self.close, self.window.mean(), self.window.std(), self.std_dev)
+
+
+class StochasticIndicator:
+    def __init__(self, k_period=14, d_period=3):
+        self.low_min = RollingExtreme(k_period, find_max=False)
+        self.high_max = RollingExtreme(k_period)
+        self.d_window = RollingMean(d_period)
+        self.k = NAN
+
+    def update(self, high, low, close, prev_close):
+        self.low_min.push(low)
+        self.high_max.push(high)
+        low_min = self.low_min.value()
+        self.k = ((close - low_min) / (self.high_max.value() - low_min)) * 100
+        self.d_window.push(self.k)
+
+    def value(self):
+        return stochastic_summary(self.k, self.d_window.mean())
+
+
+class WilliamsRIndicator:
+    def __init__(self, period=14):
+        self.high_max = RollingExtreme(period)
+        self.low_min = RollingExtreme(period, find_max=False)
+        self.close = NAN
+
+    def update(self, high, low, close, prev_close):
+        self.high_max.push(high)
+        self.low_min.push(low)
+        self.close = close
+
+    def value(self):
+        high_max = self.high_max.value()
+        return williams_r_summary(((high_max - self.close) / (high_max - self.low_min.value())) * -100)
+
+
+def true_range(high, low, prev_close):
+    """True range of one bar; the first bar (no previous close) uses high - low."""
+    if prev_close != prev_close:
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class ATRIndicator:
+    def __init__(self, period=14):
+        self.tr = RollingMean(period)
+        self.close = NAN
+
+    def update(self, high, low, close, prev_close):
+        self.tr.push(true_range(high, low, prev_close))
+        self.close = close
+
+    def value(self):
+        return atr_summary(self.tr.mean(), self.close)
+
+
+class ADXIndicator:
+    def __init__(self, period=14):
+        self.tr = RollingMean(period)
+        self.dm_plus = RollingMean(period)
+        self.dm_minus = RollingMean(period)
+        self.dx = RollingMean(period)
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.di_plus = NAN
+        self.di_minus = NAN
+
+    def update(self, high, low, close, prev_close):
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        self.dm_plus.push(max(up_move, 0) if up_move > down_move else 0.0)
+        self.dm_minus.push(max(down_move, 0) if down_move > up_move else 0.0)
+        self.tr.push(true_range(high, low, prev_close))
+        self.prev_high = high
+        self.prev_low = low
+
+        atr = self.tr.mean()
+        self.di_plus = 100 * (self.dm_plus.mean() / atr)
+        self.di_minus = 100 * (self.dm_minus.mean() / atr)
+        self.dx.push(100 * abs(self.di_plus - self.di_minus) / (self.di_plus + self.di_minus))
+
+    def value(self):
+        return adx_summary(self.dx.mean(), self.di_plus, self.di_minus)
+
+
+class RSIIndicator:
+    def __init__(self, period=14):
+        self.gains = RollingMean(period)
+        self.losses = RollingMean(period)
+
+    def update(self, high, low, close, prev_close):
+        delta = close - prev_close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+
+    def value(self):
+        rs = self.gains.mean() / self.losses.mean()
+        return {"value": 100 - (100 / (1 + rs))}
+
+
+class IndicatorEngine:
+    """Streaming state for every /technical indicator of one ticker."""
+
+    def __init__(self):
+        self.indicators = {
+            "macd": MACDIndicator(),
+            "bollinger": BollingerIndicator(),
+            "stochastic": StochasticIndicator(),
+            "williams_r": WilliamsRIndicator(),
+            "adx": ADXIndicator(),
+            "atr": ATRIndicator(),
+            "rsi": RSIIndicator(),
+        }
+        self.prev_close = NAN
+        self.last_timestamp = None
+
+    def update(self, high, low, close, timestamp=None):
+        """Fold one new bar into every indicator."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            high, low, close = np.float64(high), np.float64(low), np.float64(close)
+            for indicator in self.indicators.values():
+                indicator.update(high, low, close, self.prev_close)
+        self.prev_close = close
+        self.last_timestamp = timestamp
+
+    def seed(self, data):
+        """Fold in every bar of an OHLC DataFrame, oldest first."""
+        for timestamp, high, low, close in zip(
+            data.index, data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy()
+        ):
+            self.update(high, low, close, timestamp)
+        return self
+
+    def value(self, name):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.indicators[name].value()
+
+
+def clone_state(obj):
+    """Copy an indicator object tree; cheaper than deepcopy as values are immutable."""
+    clone = copy.copy(obj)
+    for name, value in vars(clone).items():
+        if isinstance(value, deque):
+            setattr(clone, name, deque(value))
+        elif isinstance(value, dict):
+            setattr(clone, name, {key: clone_state(item) for key, item in value.items()})
+        elif hasattr(value, "__dict__"):
+            setattr(clone, name, clone_state(value))
+    return clone
+
+
+# Engines survive between requests so a refresh only folds in new bars
+indicator_engines = LRUCache(maxsize=500)
+indicator_lock = Lock()
+# Relative change in an already-seen close that means earlier prices were
+# adjusted upstream (a split or dividend) rather than just rounded differently
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+def get_indicator_engine(ticker, hist):
+    """
+    Return an engine holding every bar of `hist` for this ticker.
+    Completed bars are folded into the stored engine once; the last bar may
+    still be forming, so it is applied to a throwaway copy instead. A split or
+    dividend back-adjusts every earlier price, so the engine is reseeded when
+    the last bar it folded in no longer has the same close.
+    """
+    last_committed = len(hist) - 2
+    with indicator_lock:
+        engine = indicator_engines.get(ticker)
+        seen = None
+        if engine is not None and engine.last_timestamp in hist.index[:-1]:
+            seen = hist.index.get_loc(engine.last_timestamp)
+            if not np.isclose(hist['Close'].iloc[seen], engine.prev_close, rtol=ADJUSTMENT_TOLERANCE, atol=0):
+                seen = None
+
+        if seen is None:
+            engine = IndicatorEngine().seed(hist.iloc[:-1])
+        elif seen < last_committed:
+            engine.seed(hist.iloc[seen + 1:-1])
+        indicator_engines[ticker] = engine
+
+        live = clone_state(engine)
+
+    last = hist.iloc[-1]
+    live.update(last['High'], last['Low'], last['Close'], hist.index[-1])
+    return live
+
+
+def find_levels(pivots, touch_prices, lookback, min_touches, find_max):
+    """
+    Find strict local extrema of `pivots` over +/-lookback bars and count how
+    many `touch_prices` fall within 2% of each one.
+    Returns (levels, touches) sorted by touches, strongest first.
+    """
+    n = len(pivots)
+    if n < 2 * lookback + 1:
+        return np.array([]), np.array([], dtype=int)
+
+    # Extreme of every `lookback`-wide window; window k covers bars [k, k + lookback)
+    windows = np.lib.stride_tricks.sliding_window_view(pivots, lookback)
+    window_ext = windows.max(axis=1) if find_max else windows.min(axis=1)
+
+    # For candidate i the left window starts at i - lookback, the right one at i + 1
+    candidates = pivots[lookback:n - lookback]
+    left = window_ext[:n - 2 * lookback]
+    right = window_ext[lookback + 1:n - lookback + 1]
+    if find_max:
+        is_pivot = (candidates > left) & (candidates > right)
+    else:
+        is_pivot = (candidates < left) & (candidates < right)
+    levels = candidates[is_pivot]
+
+    # Count touches within 2% of each level with two binary searches
+    sorted_touches = np.sort(touch_prices[~np.isnan(touch_prices)])
+    lower = np.searchsorted(sorted_touches, levels * 0.98, side="right")
+    upper = np.searchsorted(sorted_touches, levels * 1.02, side="left")
+    touches = upper - lower
+
+    keep = touches >= min_touches
+    levels, touches = levels[keep], touches[keep]
+
+    # Stable sort keeps earlier levels first among equal touch counts
+    order = np.argsort(-touches, kind="stable")
+    return levels[order], touches[order]
+
+
 def detect_support_resistance(data, lookback=20, min_touches=2):
     """Detect support and resistance levels"""
-    highs = data['High']
-    lows = data['Low']
+    highs = data['High'].to_numpy(dtype=float)
+    lows = data['Low'].to_numpy(dtype=float)
     close = data['Close']
     
-    # Find potential resistance levels (local highs)
-    resistance_levels = []
-    for i in range(lookback, len(data) - lookback):
-        current_high = highs.iloc[i]
-        is_resistance = True
-        
-        # Check if this is a local maximum
-        for j in range(i - lookback, i):
-            if highs.iloc[j] >= current_high:
-                is_resistance = False
-                break
-        for j in range(i + 1, i + lookback + 1):
-            if j < len(highs) and highs.iloc[j] >= current_high:
-                is_resistance = False
-                break
-        
-        if is_resistance:
-            # Count how many times price has touched this level
-            touches = 0
-            for j in range(len(data)):
-                if abs(lows.iloc[j] - current_high) / current_high < 0.02:  # Within 2%
-                    touches += 1
-            
-            if touches >= min_touches:
-                resistance_levels.append({
-                    "level": current_high,
-                    "touches": touches,
-                    "strength": "strong" if touches >= 3 else "moderate"
-                })
+    # Resistance: local highs that lows have revisited
+    res_levels, res_touches = find_levels(highs, lows, lookback, min_touches, find_max=True)
+    # Support: local lows that highs have revisited
+    sup_levels, sup_touches = find_levels(lows, highs, lookback, min_touches, find_max=False)
     
-    # Find potential support levels (local lows)
-    support_levels = []
-    for i in range(lookback, len(data) - lookback):
-        current_low = lows.iloc[i]
-        is_support = True
-        
-        # Check if this is a local minimum
-        for j in range(i - lookback, i):
-            if lows.iloc[j] <= current_low:
-                is_support = False
-                break
-        for j in range(i + 1, i + lookback + 1):
-            if j < len(lows) and lows.iloc[j] <= current_low:
-                is_support = False
-                break
-        
-        if is_support:
-            # Count how many times price has touched this level
-            touches = 0
-            for j in range(len(data)):
-                if abs(highs.iloc[j] - current_low) / current_low < 0.02:  # Within 2%
-                    touches += 1
-            
-            if touches >= min_touches:
-                support_levels.append({
-                    "level": current_low,
-                    "touches": touches,
-                    "strength": "strong" if touches >= 3 else "moderate"
-                })
-    
-    # Sort by strength and get the strongest levels
-    resistance_levels.sort(key=lambda x: x["touches"], reverse=True)
-    support_levels.sort(key=lambda x: x["touches"], reverse=True)
+    resistance_levels = [
+        {
+            "level": float(level),
+            "touches": int(touches),
+            "strength": "strong" if touches >= 3 else "moderate"
+        }
+        for level, touches in zip(res_levels[:3], res_touches[:3])
+    ]
+    support_levels = [
+        {
+            "level": float(level),
+            "touches": int(touches),
+            "strength": "strong" if touches >= 3 else "moderate"
+        }
+        for level, touches in zip(sup_levels[:3], sup_touches[:3])
+    ]
     
     current_price = close.iloc[-1]
     
     return {
-        "resistance": resistance_levels[:3],  # Top 3 resistance levels
-        "support": support_levels[:3],       # Top 3 support levels
+        "resistance": resistance_levels,  # Top 3 resistance levels
+        "support": support_levels,        # Top 3 support levels
         "current_position": {
             "price": current_price,
             "nearest_resistance": resistance_levels[0]["level"] if resistance_levels else None,
@@ -716,145 +2235,265 @@ def calculate_fibonacci_levels(data, period=100):
     }
 
 
-def calculate_pivot_points(data, method="classic"):
-    """Calculate pivot points using different methods"""
-    high = data['High'].iloc[-1]
-    low = data['Low'].iloc[-1]
-    close = data['Close'].iloc[-1]
-    
-    if method == "classic":
+PIVOT_METHODS = ("classic", "woodie", "camarilla")
+
+
+def pivot_levels(high, low, close, method="classic"):
+    """
+    Pivot, resistances (r1-r4) and supports (s1-s4) for one method. Works on
+    scalars or on arrays of bars; r4/s4 are None except for camarilla.
+    """
+    if method == "camarilla":
+        range_hl = high - low
         pivot = (high + low + close) / 3
-        resistance1 = (2 * pivot) - low
-        resistance2 = pivot + (high - low)
-        resistance3 = high + 2 * (pivot - low)
-        support1 = (2 * pivot) - high
-        support2 = pivot - (high - low)
-        support3 = low - 2 * (high - pivot)
-    
-    elif method == "woodie":
+        resistance = [close + (range_hl * 1.1 / d) for d in (12, 6, 4, 2)]
+        support = [close - (range_hl * 1.1 / d) for d in (12, 6, 4, 2)]
+        return pivot, resistance, support
+
+    if method == "woodie":
         pivot = (high + low + 2 * close) / 4
-        resistance1 = (2 * pivot) - low
-        resistance2 = pivot + (high - low)
-        resistance3 = high + 2 * (pivot - low)
-        support1 = (2 * pivot) - high
-        support2 = pivot - (high - low)
-        support3 = low - 2 * (high - pivot)
-    
-    elif method == "camarilla":
-        range_hl = high - low
+    else:
         pivot = (high + low + close) / 3
-        resistance1 = close + (range_hl * 1.1 / 12)
-        resistance2 = close + (range_hl * 1.1 / 6)
-        resistance3 = close + (range_hl * 1.1 / 4)
-        resistance4 = close + (range_hl * 1.1 / 2)
-        support1 = close - (range_hl * 1.1 / 12)
-        support2 = close - (range_hl * 1.1 / 6)
-        support3 = close - (range_hl * 1.1 / 4)
-        support4 = close - (range_hl * 1.1 / 2)
-    
-    current_price = close
-    
+    resistance = [(2 * pivot) - low, pivot + (high - low), high + 2 * (pivot - low), None]
+    support = [(2 * pivot) - high, pivot - (high - low), low - 2 * (high - pivot), None]
+    return pivot, resistance, support
+
+
+def pivot_summary(method, pivot, resistance, support, current_price):
+    """Build the pivot points response for one method from scalar levels"""
     return {
         "method": method,
         "pivot": pivot,
-        "resistance": {
-            "r1": resistance1,
-            "r2": resistance2,
-            "r3": resistance3,
-            "r4": resistance4 if method == "camarilla" else None
-        },
-        "support": {
-            "s1": support1,
-            "s2": support2,
-            "s3": support3,
-            "s4": support4 if method == "camarilla" else None
-        },
+        "resistance": {f"r{i}": level for i, level in enumerate(resistance, 1)},
+        "support": {f"s{i}": level for i, level in enumerate(support, 1)},
         "current_price": current_price,
         "position": "above_pivot" if current_price > pivot else "below_pivot"
     }
 
 
+def calculate_pivot_points(data, method="classic"):
+    """Calculate pivot points using different methods"""
+    high = data['High'].iloc[-1]
+    low = data['Low'].iloc[-1]
+    close = data['Close'].iloc[-1]
+
+    pivot, resistance, support = pivot_levels(high, low, close, method)
+    return pivot_summary(method, pivot, resistance, support, close)
+
+
+# Multi-timeframe pivots
+# Daily bars are regrouped into weeks and months in place; the pivots for
+# each timeframe come from its last completed period, for every ticker of a
+# panel at once.
+PIVOT_TIMEFRAMES = ("daily", "weekly", "monthly")
+PIVOT_HISTORY_PERIOD = "3mo"  # enough daily bars for the previous month
+
+
+def pivot_period_keys(index, timeframe):
+    """Start date of the daily/weekly/monthly period each bar belongs to."""
+    days = index.normalize()
+    if timeframe == "weekly":
+        return days - pd.to_timedelta(index.dayofweek, unit="D")
+    if timeframe == "monthly":
+        return days - pd.to_timedelta(index.day - 1, unit="D")
+    return days
+
+
+def calculate_pivot_table(panel, timeframes=PIVOT_TIMEFRAMES, now=None):
+    """
+    Classic, Woodie and Camarilla pivots for each timeframe and each ticker
+    of a price panel: {ticker: {"current_price", "timeframes": {...}}}.
+    A period counts as completed once no session in it is left to settle
+    as of `now` (default: the current IST time).
+    """
+    if panel["Close"].empty:
+        return {}
+    unsettled = pd.DatetimeIndex(
+        [pd.Timestamp(unsettled_session_day(now or datetime.now(IST)))]
+    ).tz_localize(panel["Close"].index.tz)
+    tickers = list(panel["Close"].columns)
+    current_price = panel["Close"].ffill().iloc[-1].to_numpy()
+    result = {
+        ticker: {"symbol": ticker, "current_price": float(current_price[i]), "timeframes": {}}
+        for i, ticker in enumerate(tickers)
+    }
+
+    columns = np.arange(len(tickers))
+    for timeframe in timeframes:
+        keys = pivot_period_keys(panel["Close"].index, timeframe)
+        # Periods from the one holding the next unsettled session on are still in progress
+        closes = panel["Close"].groupby(keys).last()
+        closes = closes[closes.index < pivot_period_keys(unsettled, timeframe)[0]]
+        if closes.empty:
+            continue
+        # Each ticker's own latest period, which a date only some tickers
+        # traded doesn't hide from the others
+        rows = np.where(closes.notna(), np.arange(len(closes))[:, None], -1).max(axis=0)
+        high = panel["High"].groupby(keys).max().to_numpy()[rows, columns]
+        low = panel["Low"].groupby(keys).min().to_numpy()[rows, columns]
+        close = closes.to_numpy()[rows, columns]
+        close[rows < 0] = NAN
+        periods = closes.index.strftime("%Y-%m-%d")
+
+        levels = {method: pivot_levels(high, low, close, method) for method in PIVOT_METHODS}
+        for i, ticker in enumerate(tickers):
+            if np.isnan(close[i]):
+                continue
+            methods = {}
+            for method, (pivot, resistance, support) in levels.items():
+                methods[method] = pivot_summary(
+                    method,
+                    float(pivot[i]),
+                    [None if level is None else float(level[i]) for level in resistance],
+                    [None if level is None else float(level[i]) for level in support],
+                    result[ticker]["current_price"],
+                )
+            result[ticker]["timeframes"][timeframe] = {
+                "period": periods[rows[i]],
+                "high": float(high[i]),
+                "low": float(low[i]),
+                "close": float(close[i]),
+                "pivots": methods,
+            }
+    return result
+
+
+def parse_pivot_timeframes(timeframes):
+    """Comma separated timeframes as a tuple, all of them if none are given."""
+    requested = [tf.strip().lower() for tf in timeframes.split(",") if tf.strip()]
+    invalid = [tf for tf in requested if tf not in PIVOT_TIMEFRAMES]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid timeframe: {', '.join(invalid)}")
+    return tuple(requested) or PIVOT_TIMEFRAMES
+
+
+def pivot_table_for(tickers, timeframes):
+    """calculate_pivot_table over the tickers' (already fetched) daily bars."""
+    return calculate_pivot_table(get_panel(tickers, PIVOT_HISTORY_PERIOD), timeframes)
+
+
+@app.get("/pivots/{ticker}")
+@swr_cached(analysis_cache)
+@async_single_flight("pivots")
+async def get_multi_timeframe_pivots(ticker: str, timeframes: str = "daily,weekly,monthly"):
+    """Classic, Woodie and Camarilla pivots for daily, weekly and monthly timeframes."""
+    requested = parse_pivot_timeframes(timeframes)
+    try:
+        await prefetch_ohlcv([ticker], PIVOT_HISTORY_PERIOD)
+        table = await asyncio.to_thread(pivot_table_for, [ticker], requested)
+        if ticker not in table:
+            raise HTTPException(status_code=404, detail="No historical data found")
+        return table[ticker]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/pivots")
+async def get_watchlist_pivots(tickers: list[str], timeframes: str = "daily,weekly,monthly"):
+    """Multi-timeframe pivots for a whole watchlist, computed across tickers at once."""
+    requested = parse_pivot_timeframes(timeframes)
+    tickers = list(dict.fromkeys(tickers))
+    await prefetch_ohlcv(tickers, PIVOT_HISTORY_PERIOD)
+    try:
+        table = await asyncio.to_thread(pivot_table_for, tickers, requested)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "pivots": [table[ticker] for ticker in tickers if ticker in table],
+        "missing": [ticker for ticker in tickers if ticker not in table],
+    }
+
+
 @app.get("/technical/{ticker}")
-@cached(cache=analysis_cache)
-def get_advanced_technicals(ticker: str, indicators: str = "macd,bollinger,rsi,stoch"):
+@swr_cached(analysis_cache)
+@async_single_flight("technical")
+async def get_advanced_technicals(ticker: str, indicators: str = "macd,bollinger,rsi,stoch"):
     """Get advanced technical indicators for a ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="1y")
+        hist = await get_ohlcv_async(ticker, period="1y")
         
         if hist.empty:
             raise HTTPException(status_code=404, detail="No historical data found")
         
-        # Parse requested indicators
-        requested_indicators = [ind.strip().lower() for ind in indicators.split(",")]
-        result = {"symbol": ticker, "indicators": {}}
-        
-        # Calculate requested indicators
-        if "macd" in requested_indicators:
-            result["indicators"]["macd"] = calculate_macd(hist)
-        
-        if "bollinger" in requested_indicators:
-            result["indicators"]["bollinger"] = calculate_bollinger_bands(hist)
-        
-        if "stoch" in requested_indicators or "stochastic" in requested_indicators:
-            result["indicators"]["stochastic"] = calculate_stochastic(hist)
-        
-        if "williams" in requested_indicators or "williams_r" in requested_indicators:
-            result["indicators"]["williams_r"] = calculate_williams_r(hist)
-        
-        if "adx" in requested_indicators:
-            result["indicators"]["adx"] = calculate_adx(hist)
-        
-        if "atr" in requested_indicators:
-            result["indicators"]["atr"] = calculate_atr(hist)
-        
-        # Always include basic RSI if requested
-        if "rsi" in requested_indicators:
-            delta = hist["Close"].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs.iloc[-1]))
-            result["indicators"]["rsi"] = {"value": rsi}
-        
-        return result
+        return await asyncio.to_thread(technicals_response, ticker, hist, indicators)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def technicals_response(ticker, hist, indicators):
+    """Response body for /technical from 1y of daily bars."""
+    # Parse requested indicators
+    requested_indicators = [ind.strip().lower() for ind in indicators.split(",")]
+    result = {"symbol": ticker, "indicators": {}}
+    
+    # Indicators come from the streaming engine, which only folds in
+    # bars it hasn't seen since the last request
+    engine = get_indicator_engine(ticker, hist)
+
+    if "macd" in requested_indicators:
+        result["indicators"]["macd"] = engine.value("macd")
+    
+    if "bollinger" in requested_indicators:
+        result["indicators"]["bollinger"] = engine.value("bollinger")
+    
+    if "stoch" in requested_indicators or "stochastic" in requested_indicators:
+        result["indicators"]["stochastic"] = engine.value("stochastic")
+    
+    if "williams" in requested_indicators or "williams_r" in requested_indicators:
+        result["indicators"]["williams_r"] = engine.value("williams_r")
+    
+    if "adx" in requested_indicators:
+        result["indicators"]["adx"] = engine.value("adx")
+    
+    if "atr" in requested_indicators:
+        result["indicators"]["atr"] = engine.value("atr")
+    
+    if "rsi" in requested_indicators:
+        result["indicators"]["rsi"] = engine.value("rsi")
+    
+    return result
+
+
 @app.get("/support-resistance/{ticker}")
-@cached(cache=analysis_cache)
-def get_support_resistance(ticker: str):
+@swr_cached(analysis_cache)
+@async_single_flight("support_resistance")
+async def get_support_resistance(ticker: str):
     """Get support and resistance levels for a ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="1y")
+        hist = await get_ohlcv_async(ticker, period="1y")
         
         if hist.empty:
             raise HTTPException(status_code=404, detail="No historical data found")
         
-        sr_levels = detect_support_resistance(hist)
-        fib_levels = calculate_fibonacci_levels(hist)
+        sr_levels, fib_levels = await asyncio.to_thread(
+            lambda: (detect_support_resistance(hist), calculate_fibonacci_levels(hist))
+        )
         
         return {
             "symbol": ticker,
             "support_resistance": sr_levels,
             "fibonacci": fib_levels
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/pivot-points/{ticker}")
-@cached(cache=analysis_cache)
-def get_pivot_points(ticker: str, method: str = "classic"):
+@swr_cached(analysis_cache)
+@async_single_flight("pivot_points")
+async def get_pivot_points(ticker: str, method: str = "classic"):
     """Get pivot points for a ticker."""
     try:
         if method not in ["classic", "woodie", "camarilla"]:
             method = "classic"
         
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d")  # Need recent data for pivot points
+        hist = await get_ohlcv_async(ticker, period="5d")  # Need recent data for pivot points
         
         if hist.empty:
             raise HTTPException(status_code=404, detail="No historical data found")
@@ -862,175 +2501,720 @@ def get_pivot_points(ticker: str, method: str = "classic"):
         pivot_data = calculate_pivot_points(hist, method)
         
         return pivot_data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def calculate_var(returns, confidence_level=0.95):
-    """Calculate Value at Risk (VaR) using historical method"""
-    if len(returns) == 0:
-        return 0.0
-    
-    # Sort returns in ascending order
-    sorted_returns = np.sort(returns)
-    
-    # Calculate the percentile
-    var_index = int((1 - confidence_level) * len(sorted_returns))
-    var = sorted_returns[var_index] if var_index < len(sorted_returns) else sorted_returns[-1]
-    
-    return var
-
-
-def calculate_max_drawdown(prices):
-    """Calculate Maximum Drawdown"""
-    if len(prices) < 2:
-        return 0.0
-    
-    peak = prices[0]
-    max_drawdown = 0.0
-    
-    for price in prices[1:]:
-        if price > peak:
-            peak = price
-        
-        drawdown = (peak - price) / peak
-        if drawdown > max_drawdown:
-            max_drawdown = drawdown
-    
-    return max_drawdown
+# Screener
+# Indicators for a whole universe are computed on dates x tickers panels, one
+# vectorized pass per indicator instead of one pandas pipeline per ticker.
+NIFTY_50 = tuple(
+    f"{symbol}.NS"
+    for symbol in (
+        "ADANIENT", "ADANIPORTS", "APOLLOHOSP", "ASIANPAINT", "AXISBANK", "BAJAJ-AUTO",
+        "BAJFINANCE", "BAJAJFINSV", "BEL", "BHARTIARTL", "CIPLA", "COALINDIA", "DRREDDY",
+        "EICHERMOT", "ETERNAL", "GRASIM", "HCLTECH", "HDFCBANK", "HDFCLIFE", "HEROMOTOCO",
+        "HINDALCO", "HINDUNILVR", "ICICIBANK", "INDUSINDBK", "INFY", "ITC", "JIOFIN",
+        "JSWSTEEL", "KOTAKBANK", "LT", "M&M", "MARUTI", "NESTLEIND", "NTPC", "ONGC",
+        "POWERGRID", "RELIANCE", "SBILIFE", "SHRIRAMFIN", "SBIN", "SUNPHARMA",
+        "TATACONSUM", "TATAMOTORS", "TATASTEEL", "TCS", "TECHM", "TITAN", "TRENT",
+        "ULTRACEMCO", "WIPRO",
+    )
+)
+SCREENER_UNIVERSES = {"nifty50": NIFTY_50}
+SCREENER_MAX_TICKERS = 1000
+SCREENER_FIELDS = (
+    "price", "change", "rsi", "macd", "macd_signal", "macd_histogram",
+    "bollinger_position", "bollinger_bandwidth", "adx", "di_plus", "di_minus",
+    "atr", "atr_percent",
+)
+FILTER_CLAUSE = re.compile(r"^\s*([a-z_]+)\s*(<=|>=|==|!=|<|>)\s*(-?\d+(?:\.\d+)?)\s*$")
+FILTER_OPS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater,
+    ">=": np.greater_equal, "==": np.equal, "!=": np.not_equal,
+}
 
 
-def calculate_correlation_matrix(tickers, period="1y"):
-    """Calculate correlation matrix for multiple tickers"""
-    correlation_data = {}
-    
+def get_panel(tickers, period="1y"):
+    """
+    Aligned OHLCV panels for tickers: a dict of field -> DataFrame (dates x
+    tickers), NaN where a ticker has no bar. Tickers without data are left out.
+    Single-ticker panels are rebuilt from the cached bars instead of cached,
+    so per-ticker pages don't evict the costly multi-ticker panels.
+    """
+    key = (tuple(tickers), period)
+    cacheable = len(key[0]) > 1
+    with panel_lock:
+        panel = panel_cache.get(key) if cacheable else None
+    if panel is not None:
+        return panel
+
+    histories = {}
     for ticker in tickers:
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            
-            if not hist.empty:
-                # Calculate daily returns
-                returns = hist['Close'].pct_change().dropna()
-                correlation_data[ticker] = returns
+            hist = get_ohlcv(ticker, period=period)
         except Exception as e:
             print(f"Error fetching data for {ticker}: {e}")
             continue
-    
-    if len(correlation_data) < 2:
-        return {}
-    
-    # Create DataFrame and calculate correlation matrix
-    returns_df = pd.DataFrame(correlation_data)
-    correlation_matrix = returns_df.corr()
-    
-    # Convert to dictionary format
-    result = {}
-    for ticker1 in correlation_matrix.columns:
-        result[ticker1] = {}
-        for ticker2 in correlation_matrix.columns:
-            result[ticker1][ticker2] = float(correlation_matrix.loc[ticker1, ticker2])
-    
+        if not hist.empty:
+            histories[ticker] = hist
+
+    combined = pd.concat(histories, axis=1) if histories else pd.DataFrame()
+    # One float block per field; column-wise blocks make every panel op crawl
+    panel = {
+        field: pd.DataFrame(
+            combined.xs(field, axis=1, level=1).to_numpy(dtype=float) if histories else None,
+            index=combined.index,
+            columns=list(histories),
+        )
+        for field in OHLCV_FIELDS
+    }
+    if cacheable:
+        with panel_lock:
+            panel_cache[key] = panel
+    return panel
+
+
+def bars_by_ticker(panel, fields=("High", "Low", "Close")):
+    """
+    Panel fields as arrays with each ticker's own bars packed at the bottom,
+    so row -1 is every ticker's latest bar and -2 the one before it. A date
+    only some tickers traded (a special session, a halt) then leaves no gaps
+    in the others' rolling windows. Rows no longer share a date across columns.
+    """
+    order = np.argsort(~np.isnan(panel["Close"].to_numpy()), axis=0, kind="stable")
+    return [np.take_along_axis(panel[field].to_numpy(), order, axis=0) for field in fields]
+
+
+def rolling(values, window, reduce=np.mean, **kwargs):
+    """
+    Rolling `reduce` down the rows of a 2D array, NaN until a full window
+    (like pandas rolling(window) with the default min_periods).
+    """
+    out = np.full(values.shape, NAN)
+    if len(values) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        out[window - 1:] = reduce(windows, axis=-1, **kwargs)
+    return out
+
+
+def screen_indicators(panel, period=14):
+    """
+    Latest indicator values for every ticker of a panel, as a DataFrame
+    (tickers x SCREENER_FIELDS). Same definitions as the /technical indicators,
+    each computed over the ticker's own bars.
+    """
+    tickers = panel["Close"].columns
+    high, low, close = bars_by_ticker(panel)
+    if len(close) < 2:
+        return pd.DataFrame(NAN, index=tickers, columns=SCREENER_FIELDS)
+    close_frame = pd.DataFrame(close, columns=tickers)
+
+    def shift(values):
+        return np.vstack([np.full((1, values.shape[1]), NAN), values[:-1]])
+
+    prev_close, prev_high, prev_low = shift(close), shift(high), shift(low)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # RSI (a missing change counts as no gain and no loss)
+        delta = close - prev_close
+        gain = rolling(np.where(delta > 0, delta, 0), period)
+        loss = rolling(np.where(delta < 0, -delta, 0), period)
+        rsi = 100 - (100 / (1 + gain[-1] / loss[-1]))
+
+        # MACD
+        macd = close_frame.ewm(span=12).mean() - close_frame.ewm(span=26).mean()
+        signal_line = macd.ewm(span=9).mean().to_numpy()[-1]
+        macd = macd.to_numpy()[-1]
+
+        # Bollinger Bands
+        sma = rolling(close, 20)[-1]
+        std = rolling(close, 20, np.std, ddof=1)[-1]
+        upper, lower = sma + 2 * std, sma - 2 * std
+
+        # True range, ignoring the missing previous close on a ticker's first bar
+        tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        atr = rolling(tr, period)
+
+        # ADX
+        up_move, down_move = high - prev_high, prev_low - low
+        dm_plus = np.where(up_move > down_move, np.maximum(up_move, 0), 0)
+        dm_minus = np.where(down_move > up_move, np.maximum(down_move, 0), 0)
+        di_plus = 100 * (rolling(dm_plus, period) / atr)
+        di_minus = 100 * (rolling(dm_minus, period) / atr)
+        dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+        adx = rolling(dx[-period:], period)[-1]
+
+        latest = close[-1]
+        return pd.DataFrame(
+            {
+                "price": latest,
+                "change": (latest / close[-2] - 1) * 100,
+                "rsi": rsi,
+                "macd": macd,
+                "macd_signal": signal_line,
+                "macd_histogram": macd - signal_line,
+                "bollinger_position": (latest - lower) / (upper - lower) * 100,
+                "bollinger_bandwidth": (upper - lower) / sma * 100,
+                "adx": adx,
+                "di_plus": di_plus[-1],
+                "di_minus": di_minus[-1],
+                "atr": atr[-1],
+                "atr_percent": atr[-1] / latest * 100,
+            },
+            index=tickers,
+        )
+
+
+def parse_screener_filter(expression):
+    """
+    Parse "rsi < 30 and adx > 25" into [(field, op, value)]. Clauses compare
+    a SCREENER_FIELDS name with a number and are joined by "and".
+    """
+    clauses = []
+    for clause in re.split(r"\band\b", expression.lower()) if expression.strip() else []:
+        match = FILTER_CLAUSE.match(clause)
+        if not match or match.group(1) not in SCREENER_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Invalid filter clause: {clause.strip()!r}")
+        clauses.append((match.group(1), FILTER_OPS[match.group(2)], float(match.group(3))))
+    return clauses
+
+
+def run_screener(tickers, clauses, sort, descending, limit):
+    """Screen tickers and return the matching rows, sorted and limited."""
+    table = screen_indicators(get_panel(tickers))
+
+    mask = np.ones(len(table), dtype=bool)
+    for field, op, value in clauses:
+        mask &= op(table[field].to_numpy(), value)
+    matches = table[mask]
+    if sort:
+        matches = matches.sort_values(sort, ascending=not descending, na_position="last")
+
+    return {
+        "scanned": len(table),
+        "matched": len(matches),
+        "missing": [t for t in tickers if t not in table.index],
+        "results": [
+            {"symbol": symbol, **row}
+            for symbol, row in zip(matches.index[:limit], matches.iloc[:limit].to_dict("records"))
+        ],
+    }
+
+
+@app.get("/screener")
+async def get_screener(
+    universe: str = "nifty50",
+    tickers: str = "",
+    filter: str = "",
+    sort: str = "",
+    limit: int = 50,
+):
+    """
+    Screen a universe by technical indicators, e.g.
+    /screener?filter=rsi < 30 and adx > 25&sort=-adx. `tickers` (comma
+    separated) overrides the named universe; prefix sort with "-" for descending.
+    """
+    if tickers:
+        ticker_list = list(dict.fromkeys(t.strip() for t in tickers.split(",") if t.strip()))
+    elif universe.lower() in SCREENER_UNIVERSES:
+        ticker_list = list(SCREENER_UNIVERSES[universe.lower()])
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown universe: {universe}")
+    if len(ticker_list) > SCREENER_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {SCREENER_MAX_TICKERS} tickers")
+
+    clauses = parse_screener_filter(filter)
+    descending = sort.startswith("-")
+    sort = sort.lstrip("-").lower()
+    if sort and sort not in SCREENER_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort}")
+
+    try:
+        await prefetch_ohlcv(ticker_list, "1y")
+        return await asyncio.to_thread(run_screener, ticker_list, clauses, sort, descending, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Benchmarks selectable for beta/alpha; a raw index symbol ("^...") also works
+BENCHMARKS = {
+    "nifty50": "^NSEI",
+    "sensex": "^BSESN",
+    "niftybank": "^NSEBANK",
+    "niftyit": "^CNXIT",
+    "niftypharma": "^CNXPHARMA",
+    "niftyauto": "^CNXAUTO",
+    "niftyfmcg": "^CNXFMCG",
+    "niftymetal": "^CNXMETAL",
+    "niftyenergy": "^CNXENERGY",
+    "niftyrealty": "^CNXREALTY",
+}
+
+
+def benchmark_symbol(benchmark):
+    """Index symbol for a benchmark name, or the symbol itself if one is given."""
+    if benchmark.startswith("^"):
+        return benchmark
+    try:
+        return BENCHMARKS[benchmark.lower()]
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown benchmark {benchmark!r}, expected one of {', '.join(BENCHMARKS)}",
+        )
+
+
+@cached(cache=benchmark_cache, lock=benchmark_lock)
+@single_flight("benchmark")
+def get_benchmark_returns(symbol, period="2y"):
+    """Daily returns of a benchmark index, fetched once and shared by every ticker."""
+    close = get_ohlcv(symbol, period=period)["Close"]
+    return close.pct_change().dropna()
+
+
+def calculate_risk_metrics(returns, market_returns=None, confidence_levels=(0.95, 0.99), periods_per_year=252):
+    """
+    Compute per-asset risk metrics for every column of a returns matrix at once.
+    `returns` is a 2D array (dates x tickers) with NaN where a ticker has no bar,
+    `market_returns` an optional 1D array on the same dates for beta/alpha.
+    Returns a dict of 1D arrays, one value per ticker.
+    """
+    returns = np.asarray(returns, dtype=float)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    n_dates, n_assets = returns.shape
+
+    valid = ~np.isnan(returns)
+    counts = valid.sum(axis=0)
+    safe_counts = np.maximum(counts, 1)
+    filled = np.where(valid, returns, 0.0)
+
+    mean = filled.sum(axis=0) / safe_counts
+    demeaned = np.where(valid, returns - mean, 0.0)
+    std = np.sqrt((demeaned ** 2).sum(axis=0) / np.maximum(counts - 1, 1))
+    std[counts < 2] = 0.0
+
+    metrics = {
+        "data_points": counts,
+        "volatility": std * np.sqrt(periods_per_year),
+    }
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["sharpe_ratio"] = np.where(
+            std > 0, (mean * periods_per_year) / (std * np.sqrt(periods_per_year)), 0.0
+        )
+
+    # Historical VaR/CVaR: partial selection puts the k-th smallest return of
+    # each column in place without sorting the whole column. Missing bars are
+    # pushed to the end so each column uses only its own observations.
+    ranked = np.where(valid, returns, np.inf)
+    rows = np.arange(n_dates)[:, None]
+    for level in confidence_levels:
+        k = np.minimum(((1 - level) * counts).astype(int), np.maximum(counts - 1, 0))
+        partitioned = np.partition(ranked, np.unique(k), axis=0) if n_dates else ranked
+        var = partitioned[k, np.arange(n_assets)] if n_dates else np.zeros(n_assets)
+        tail = rows <= k
+        cvar = np.where(tail, partitioned, 0.0).sum(axis=0) / np.maximum(k + 1, 1)
+
+        suffix = int(round(level * 100))
+        metrics[f"var_{suffix}"] = np.where(counts > 0, var, 0.0)
+        metrics[f"cvar_{suffix}"] = np.where(counts > 0, cvar, 0.0)
+
+    # Max drawdown from the compounded wealth curve using running maxima
+    wealth = np.vstack([np.ones((1, n_assets)), np.cumprod(1 + filled, axis=0)])
+    peaks = np.maximum.accumulate(wealth, axis=0)
+    metrics["max_drawdown"] = ((peaks - wealth) / peaks).max(axis=0)
+
+    # Beta and annualized alpha against the market on dates where both have a return
+    beta = np.ones(n_assets)
+    alpha = np.zeros(n_assets)
+    if market_returns is not None:
+        beta, alpha = regress_on_benchmark(np.where(valid, returns, np.nan), market_returns)
+        alpha = alpha * periods_per_year
+    metrics["beta"] = beta
+    metrics["alpha"] = alpha
+
+    return metrics
+
+
+# Portfolio VaR
+MONTE_CARLO_PATHS = 100_000
+MONTE_CARLO_MAX_PATHS = 1_000_000
+VAR_MAX_HORIZON = 252  # days
+MONTE_CARLO_MAX_DRAWS = 20_000_000  # paths x horizon daily draws per request
+MONTE_CARLO_CHUNK = 1_000_000  # daily draws generated at a time
+MONTE_CARLO_SEED = 42
+
+
+def fitted_degrees_of_freedom(daily):
+    """
+    Student-t degrees of freedom matching the excess kurtosis of daily
+    portfolio returns (method of moments); inf (normal) if tails aren't fat.
+    """
+    centered = daily - daily.mean()
+    variance = (centered ** 2).mean()
+    excess_kurtosis = (centered ** 4).mean() / variance ** 2 - 3 if variance > 0 else 0.0
+    return 4 + 6 / excess_kurtosis if excess_kurtosis > 0 else float("inf")
+
+
+def simulate_portfolio_returns(mean, std, df, horizon, paths, seed):
+    """
+    `paths` horizon-day portfolio returns, each the sum of `horizon` daily
+    Student-t draws (normal if df is inf) scaled to the daily mean and std.
+    Generated in chunks, so memory stays bounded for any paths x horizon.
+    """
+    rng = np.random.default_rng(seed)
+    simulated = np.empty(paths)
+    chunk = max(1, MONTE_CARLO_CHUNK // horizon)
+    for start in range(0, paths, chunk):
+        size = (min(chunk, paths - start), horizon)
+        if np.isfinite(df):
+            draws = rng.standard_t(df, size) * np.sqrt((df - 2) / df)  # unit variance
+        else:
+            draws = rng.standard_normal(size)
+        simulated[start:start + size[0]] = mean * horizon + std * draws.sum(axis=1)
+    return simulated
+
+
+def tail_loss(portfolio_returns, level):
+    """(VaR, CVaR) of a 1D sample of portfolio returns, as positive losses."""
+    k = min(int((1 - level) * len(portfolio_returns)), len(portfolio_returns) - 1)
+    partitioned = np.partition(portfolio_returns, k)
+    return -float(partitioned[k]), -float(partitioned[: k + 1].mean())
+
+
+def calculate_portfolio_var(
+    returns,
+    weights,
+    confidence_levels=(0.95, 0.99),
+    horizon=1,
+    paths=MONTE_CARLO_PATHS,
+    seed=MONTE_CARLO_SEED,
+):
+    """
+    Portfolio VaR/CVaR for `weights` over a returns matrix (dates x assets),
+    as positive fractions of portfolio value over `horizon` days:
+
+    - parametric: normal, from the mean vector and covariance matrix
+    - historical: the weighted portfolio's own daily (or overlapping
+      horizon-day) returns
+    - monte_carlo: `paths` seeded simulations of fat-tailed daily portfolio
+      returns, Student-t with the parametric mean and volatility and the
+      sample's kurtosis (skipped when paths is 0). Any normal or t model of
+      the assets gives a portfolio return of this form, so the draws are
+      per portfolio rather than per asset.
+
+    Means and covariances use every date each asset (or pair) has a return,
+    so one recent listing doesn't shorten the others' sample; the historical
+    method needs all assets and uses only the dates they share.
+    """
+    returns = np.asarray(returns, dtype=float).reshape(len(returns), -1)
+    weights = np.asarray(weights, dtype=float)
+    valid = ~np.isnan(returns)
+    complete = returns[valid.all(axis=1)]
+
+    # Pairwise-complete covariance, as pandas DataFrame.cov computes it
+    filled, present = np.where(valid, returns, 0.0), valid.astype(float)
+    pair_counts = present.T @ present
+    if pair_counts.min() < 2 or len(complete) < 2:
+        raise ValueError("Not enough overlapping history for portfolio VaR")
+    pair_sums = filled.T @ present  # [i, j]: sum of asset i over dates j also has
+    covariance = (filled.T @ filled - pair_sums * pair_sums.T / pair_counts) / (pair_counts - 1)
+
+    mean = filled.sum(axis=0) / valid.sum(axis=0)
+    portfolio_mean = float(weights @ mean) * horizon
+    portfolio_std = float(np.sqrt(max(weights @ covariance @ weights, 0) * horizon))
+
+    # Overlapping horizon-day sums of daily portfolio returns
+    daily = complete @ weights
+    cumulative = np.concatenate([[0.0], np.cumsum(daily)])
+    historical = cumulative[horizon:] - cumulative[:-horizon] if horizon < len(daily) else daily
+
+    simulated = None
+    if paths:
+        df = fitted_degrees_of_freedom(daily)
+        simulated = simulate_portfolio_returns(
+            portfolio_mean / horizon, portfolio_std / np.sqrt(horizon), df, horizon, paths, seed
+        )
+
+    result = {
+        "observations": len(complete),
+        "pairwise_observations": int(pair_counts.min()),
+        "horizon": horizon,
+        "expected_return": portfolio_mean,
+        "volatility": portfolio_std,
+    }
+    for level in confidence_levels:
+        suffix = int(round(level * 100))
+        z = NormalDist().inv_cdf(1 - level)
+        result[f"parametric_var_{suffix}"] = -(portfolio_mean + z * portfolio_std)
+        result[f"parametric_cvar_{suffix}"] = -(
+            portfolio_mean - portfolio_std * NormalDist().pdf(z) / (1 - level)
+        )
+        var, cvar = tail_loss(historical, level)
+        result[f"historical_var_{suffix}"] = var
+        result[f"historical_cvar_{suffix}"] = cvar
+        if simulated is not None:
+            var, cvar = tail_loss(simulated, level)
+            result[f"monte_carlo_var_{suffix}"] = var
+            result[f"monte_carlo_cvar_{suffix}"] = cvar
+    if simulated is not None:
+        result["paths"] = paths
+        result["seed"] = seed
+        result["degrees_of_freedom"] = float(df) if np.isfinite(df) else None
     return result
 
 
+def normalize_weights(holdings):
+    """Holdings (ticker -> weight or position value) as weights summing to 1."""
+    total = sum(holdings.values())
+    if not total:
+        raise HTTPException(status_code=400, detail="Holdings must not sum to zero")
+    return {ticker: value / total for ticker, value in holdings.items()}
+
+
+@app.post("/portfolio-var")
+async def get_portfolio_var(
+    holdings: dict[str, float],
+    horizon: int = 1,
+    paths: int = MONTE_CARLO_PATHS,
+    seed: int = MONTE_CARLO_SEED,
+):
+    """
+    Parametric, historical and Monte Carlo VaR/CVaR for a weighted portfolio.
+    Body: {ticker: weight or position value}; weights are normalized.
+    """
+    if not holdings:
+        raise HTTPException(status_code=400, detail="No holdings provided")
+    if not 0 <= paths <= MONTE_CARLO_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"paths must be between 0 and {MONTE_CARLO_MAX_PATHS}")
+    if not 1 <= horizon <= VAR_MAX_HORIZON:
+        raise HTTPException(status_code=400, detail=f"horizon must be between 1 and {VAR_MAX_HORIZON} days")
+    if paths * horizon > MONTE_CARLO_MAX_DRAWS:
+        raise HTTPException(
+            status_code=400, detail=f"paths x horizon must be at most {MONTE_CARLO_MAX_DRAWS:,}"
+        )
+    weights = normalize_weights(holdings)
+
+    await prefetch_ohlcv(weights, "2y")
+    try:
+        return await asyncio.to_thread(portfolio_var_response, weights, horizon, paths, seed)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def portfolio_var_response(weights, horizon, paths, seed):
+    """Response body for /portfolio-var."""
+    returns = get_returns_panel(list(weights), "2y")
+    missing = [ticker for ticker in weights if ticker not in returns.columns]
+    if missing:
+        raise ValueError(f"No historical data for: {', '.join(missing)}")
+
+    result = calculate_portfolio_var(
+        returns.to_numpy(), [weights[t] for t in returns.columns],
+        horizon=horizon, paths=paths, seed=seed,
+    )
+    return {"weights": weights, **result}
+
+
+def regress_on_benchmark(returns, market_returns, min_observations=30):
+    """
+    OLS beta and per-period alpha of every column of `returns` (dates x
+    tickers, NaN where missing) on `market_returns`, each over the dates
+    both have. Sums for all columns come from a few matrix products against
+    the benchmark. Columns with too few dates get beta 1 and alpha 0.
+    """
+    market = np.asarray(market_returns, dtype=float)
+    both = ~np.isnan(returns) & ~np.isnan(market)[:, None]
+    r = np.where(both, returns, 0.0)
+    m = np.where(np.isnan(market), 0.0, market)
+    mask = both.astype(float)
+
+    n = mask.sum(axis=0)
+    sum_m = m @ mask
+    sum_mm = (m * m) @ mask
+    sum_r = r.sum(axis=0)
+    sum_mr = m @ r
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_mr - sum_m * sum_r / n
+        market_variance = sum_mm - sum_m ** 2 / n
+        ok = (n > min_observations) & (market_variance > 0)
+        beta = np.where(ok, covariance / market_variance, 1.0)
+        alpha = np.where(ok, (sum_r - beta * sum_m) / n, 0.0)
+    return beta, alpha
+
+
+def get_returns_panel(tickers, period="1y"):
+    """
+    Daily close-to-close returns, dates x tickers, from the shared price panel.
+    Each return runs from the ticker's previous bar, so a date that only some
+    tickers traded doesn't cost the others a return.
+    """
+    close = get_panel(tickers, period)["Close"]
+    return (close / close.ffill().shift(1) - 1).iloc[1:]
+
+
+def correlation_engine(returns):
+    """
+    Pearson correlation of every pair of columns of a returns panel, using
+    each pair's overlapping dates (like DataFrame.corr()). Returns are
+    standardized and multiplied as float32 matrices, so 500+ tickers take
+    a few matrix products. NaN where a pair has fewer than 2 common dates.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Standardize each column over all its dates; correlation is unchanged
+        # by this, and it keeps float32 sums well conditioned
+        mean = np.nansum(values, axis=0) / counts
+        std = np.sqrt(np.nansum((values - mean) ** 2, axis=0) / counts)
+        z = np.where(valid, (values - mean) / std, 0).astype(np.float32)
+
+        if valid.all():
+            n = len(values)
+            corr = (z.T @ z) / n
+        else:
+            # Pairwise complete observations: n, sums and sums of squares of
+            # column i over the dates column j also has
+            mask = valid.astype(np.float32)
+            n = mask.T @ mask
+            sums = z.T @ mask
+            squares = (z * z).T @ mask
+            products = z.T @ z
+            covariance = n * products - sums * sums.T
+            corr = covariance / np.sqrt((n * squares - sums ** 2) * (n * squares - sums ** 2).T)
+            corr[n < 2] = np.nan
+
+    corr = np.clip(corr, -1, 1)
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return corr
+
+
+def calculate_correlation_matrix(tickers, period="1y", returns=None):
+    """
+    Calculate correlation matrix for multiple tickers as {t1: {t2: corr}}.
+    Pass `returns` to reuse an already built returns panel.
+    """
+    if returns is None:
+        returns = get_returns_panel(tickers, period)
+    if returns.shape[1] < 2:
+        return {}
+
+    names = list(returns.columns)
+    matrix = correlation_engine(returns).astype(float).tolist()
+    return {ticker: dict(zip(names, row)) for ticker, row in zip(names, matrix)}
+
+
 @app.post("/risk-analysis")
-def get_portfolio_risk_analysis(tickers: list[str]):
-    """Get comprehensive risk analysis for portfolio tickers"""
+async def get_portfolio_risk_analysis(tickers: list[str], benchmark: str = "nifty50"):
+    """
+    Get comprehensive risk analysis for portfolio tickers. Beta and alpha
+    are measured against `benchmark` (see BENCHMARKS).
+    """
+    symbol = benchmark_symbol(benchmark)
+    # Download every history concurrently, then compute off the event loop
+    await prefetch_ohlcv([*tickers, symbol], "2y")
+    return await asyncio.to_thread(portfolio_risk_analysis, tickers, symbol)
+
+
+def portfolio_risk_analysis(tickers, benchmark="^NSEI"):
+    """Risk analysis for /risk-analysis; histories are normally already cached."""
     try:
         if not tickers:
             raise HTTPException(status_code=400, detail="No tickers provided")
         
+        # Use 2 years of history for better risk analysis
+        histories, errors = fan_out(
+            {ticker: partial(get_ohlcv, ticker, "2y") for ticker in dict.fromkeys(tickers)}
+        )
+
         risk_analysis = {}
-        
-        for ticker in tickers:
+        returns_by_ticker = {}
+        for ticker in dict.fromkeys(tickers):
+            hist = histories.get(ticker)
+            if hist is None:
+                risk_analysis[ticker] = {"error": errors.get(ticker, "Failed to fetch")}
+            elif hist.empty:
+                risk_analysis[ticker] = {"error": "No historical data available"}
+            else:
+                returns_by_ticker[ticker] = hist['Close'].pct_change().dropna()
+
+        if returns_by_ticker:
+            # Align all tickers on one date axis and compute every metric in one pass
+            returns_panel = pd.DataFrame(returns_by_ticker)
+
+            market_returns = None
             try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="2y")  # Use 2 years for better risk analysis
-                
-                if hist.empty:
-                    risk_analysis[ticker] = {"error": "No historical data available"}
-                    continue
-                
-                prices = hist['Close']
-                returns = prices.pct_change().dropna()
-                
-                # Calculate risk metrics
-                var_95 = calculate_var(returns, 0.95)
-                var_99 = calculate_var(returns, 0.99)
-                max_dd = calculate_max_drawdown(prices)
-                
-                # Calculate volatility (annualized)
-                volatility = returns.std() * np.sqrt(252)
-                
-                # Calculate beta (if possible)
-                try:
-                    # Get market data (Nifty 50)
-                    market = yf.Ticker("^NSEI")
-                    market_hist = market.history(period="2y")
-                    
-                    if not market_hist.empty:
-                        market_returns = market_hist['Close'].pct_change().dropna()
-                        
-                        # Align returns
-                        aligned_returns = pd.DataFrame({
-                            'stock': returns,
-                            'market': market_returns
-                        }).dropna()
-                        
-                        if len(aligned_returns) > 30:
-                            covariance = aligned_returns.cov().iloc[0, 1]
-                            market_variance = aligned_returns['market'].var()
-                            beta = covariance / market_variance if market_variance != 0 else 1.0
-                        else:
-                            beta = 1.0
-                    else:
-                        beta = 1.0
-                except:
-                    beta = 1.0
-                
+                # Benchmark returns are fetched once and cached for every ticker
+                market_returns = (
+                    get_benchmark_returns(benchmark, "2y").reindex(returns_panel.index).to_numpy()
+                )
+            except Exception:
+                pass
+
+            metrics = calculate_risk_metrics(returns_panel.to_numpy(), market_returns)
+
+            for i, ticker in enumerate(returns_panel.columns):
                 risk_analysis[ticker] = {
-                    "var_95": abs(var_95),  # VaR as positive number
-                    "var_99": abs(var_99),
-                    "max_drawdown": max_dd,
-                    "volatility": volatility,
-                    "beta": beta,
-                    "sharpe_ratio": (returns.mean() * 252) / (returns.std() * np.sqrt(252)) if returns.std() > 0 else 0,
-                    "data_points": len(returns)
+                    "var_95": abs(float(metrics["var_95"][i])),  # VaR as positive number
+                    "var_99": abs(float(metrics["var_99"][i])),
+                    "cvar_95": abs(float(metrics["cvar_95"][i])),
+                    "cvar_99": abs(float(metrics["cvar_99"][i])),
+                    "max_drawdown": float(metrics["max_drawdown"][i]),
+                    "volatility": float(metrics["volatility"][i]),
+                    "beta": float(metrics["beta"][i]),
+                    "alpha": float(metrics["alpha"][i]),
+                    "sharpe_ratio": float(metrics["sharpe_ratio"][i]),
+                    "data_points": int(metrics["data_points"][i])
                 }
-                
-            except Exception as e:
-                risk_analysis[ticker] = {"error": str(e)}
         
         # Calculate portfolio-level metrics
         valid_tickers = [t for t in tickers if t in risk_analysis and "error" not in risk_analysis[t]]
         
         if len(valid_tickers) > 1:
-            correlation_matrix = calculate_correlation_matrix(valid_tickers)
-            
-            # Calculate portfolio VaR (simplified - assumes equal weights)
-            portfolio_var_95 = 0
-            portfolio_var_99 = 0
-            
-            for ticker in valid_tickers:
-                weight = 1.0 / len(valid_tickers)  # Equal weight
-                portfolio_var_95 += (weight ** 2) * (risk_analysis[ticker]["var_95"] ** 2)
-                portfolio_var_99 += (weight ** 2) * (risk_analysis[ticker]["var_99"] ** 2)
+            # Reuse the returns already in hand, over the last year
+            last_year = returns_panel.index >= returns_panel.index[-1] - pd.DateOffset(years=1)
+            correlation_matrix = calculate_correlation_matrix(
+                valid_tickers, returns=returns_panel.loc[last_year, valid_tickers]
+            )
             
-            portfolio_var_95 = np.sqrt(portfolio_var_95)
-            portfolio_var_99 = np.sqrt(portfolio_var_99)
+            # Portfolio VaR from the covariance matrix (equal weights here;
+            # /portfolio-var takes real holdings)
+            try:
+                portfolio = calculate_portfolio_var(
+                    returns_panel[valid_tickers].to_numpy(),
+                    np.full(len(valid_tickers), 1.0 / len(valid_tickers)),
+                    paths=0,
+                )
+            except ValueError as e:
+                # e.g. a holding listed days ago; the per-asset metrics still stand
+                print(f"Portfolio VaR unavailable: {e}")
+                portfolio = {}
             
             return {
                 "individual_assets": risk_analysis,
+                "benchmark": benchmark,
                 "portfolio_metrics": {
-                    "var_95": portfolio_var_95,
-                    "var_99": portfolio_var_99,
+                    "var_95": portfolio.get("parametric_var_95"),
+                    "var_99": portfolio.get("parametric_var_99"),
+                    "historical_var_95": portfolio.get("historical_var_95"),
+                    "historical_var_99": portfolio.get("historical_var_99"),
+                    "observations": portfolio.get("observations", 0),
+                    "pairwise_observations": portfolio.get("pairwise_observations", 0),
                     "correlation_matrix": correlation_matrix
                 }
             }
         else:
             return {
                 "individual_assets": risk_analysis,
+                "benchmark": benchmark,
                 "portfolio_metrics": None
             }
             
@@ -1039,8 +3223,20 @@ def get_portfolio_risk_analysis(tickers: list[str]):
 
 
 @app.get("/correlation-matrix")
-def get_correlation_matrix_endpoint(tickers: str = ""):
-    """Get correlation matrix for specified tickers"""
+async def get_correlation_matrix_endpoint(tickers: str = "", format: str = "nested"):
+    """
+    Get correlation matrix for specified tickers.
+
+    format="nested" returns {t1: {t2: corr}}; "upper" returns the strict
+    upper triangle row by row (i < j) as one flat list; "matrix" returns
+    the full matrix as nested lists in `tickers` order.
+    """
+    await prefetch_ohlcv([t.strip() for t in tickers.split(",") if t.strip()], "1y")
+    return await asyncio.to_thread(correlation_matrix_response, tickers, format)
+
+
+def correlation_matrix_response(tickers, format="nested"):
+    """Response body for /correlation-matrix."""
     try:
         if not tickers:
             raise HTTPException(status_code=400, detail="No tickers provided")
@@ -1050,6 +3246,16 @@ def get_correlation_matrix_endpoint(tickers: str = ""):
         if len(ticker_list) < 2:
             raise HTTPException(status_code=400, detail="At least 2 tickers required for correlation analysis")
         
+        if format in ("upper", "matrix"):
+            returns = get_returns_panel(ticker_list)
+            matrix = np.round(correlation_engine(returns).astype(float), 4)
+            result = {"tickers": list(returns.columns), "format": format}
+            if format == "upper":
+                result["upper"] = matrix[np.triu_indices(len(matrix), k=1)].tolist()
+            else:
+                result["matrix"] = matrix.tolist()
+            return result
+
         correlation_matrix = calculate_correlation_matrix(ticker_list)
         
         return {
@@ -1061,6 +3267,119 @@ def get_correlation_matrix_endpoint(tickers: str = ""):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+POSITION_SIZE_COLUMNS = (
+    "current_price", "atr", "position_size_fixed", "kelly_fraction", "position_size_kelly",
+    "volatility", "position_size_volatility", "shares",
+)
+
+
+def validate_account(account_size, total_capital=None):
+    """400 unless the account size (and capital limit, if given) are positive."""
+    if account_size <= 0:
+        raise HTTPException(status_code=400, detail="account_size must be positive")
+    if total_capital is not None and total_capital <= 0:
+        raise HTTPException(status_code=400, detail="total_capital must be positive")
+
+
+def position_size_table(tickers, account_size, risk_per_trade, stop_loss_pct, period="1y"):
+    """
+    Fixed-risk, Kelly and volatility-adjusted position sizes for every ticker
+    at once, from the shared price panel. One row per ticker with data.
+    """
+    panel = get_panel(tickers, period)
+    if panel["Close"].shape[1] == 0:
+        return pd.DataFrame(columns=POSITION_SIZE_COLUMNS)
+    high, low, close = bars_by_ticker(panel)
+    returns = get_returns_panel(tickers, period).to_numpy()
+    valid = ~np.isnan(returns)
+    counts = valid.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_price = close[-1]
+
+        # Calculate ATR for volatility-based position sizing
+        prev_close = np.vstack([np.full((1, close.shape[1]), NAN), close[:-1]])
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        atr = rolling(true_range, 14)[-1]
+
+        # Method 1: Fixed Risk per Trade
+        risk_amount_fixed = account_size * (risk_per_trade / 100)
+        position_size_fixed = risk_amount_fixed / (current_price * (stop_loss_pct / 100))
+
+        # Method 2: Kelly Criterion (simplified)
+        wins, losses = valid & (returns > 0), valid & (returns < 0)
+        win_rate = wins.sum(axis=0) / counts
+        avg_win = np.where(wins, returns, 0).sum(axis=0) / wins.sum(axis=0)
+        avg_win = np.nan_to_num(avg_win)
+        avg_loss = np.abs(np.where(losses, returns, 0).sum(axis=0) / losses.sum(axis=0))
+        avg_loss = np.nan_to_num(avg_loss)
+        kelly_fraction = np.where(
+            (counts > 30) & (avg_loss > 0),
+            np.clip(win_rate - ((1 - win_rate) * (avg_win / avg_loss)), 0, 0.25),  # Cap at 25%
+            0.0,
+        )
+        position_size_kelly = (account_size * kelly_fraction) / current_price
+
+        # Method 3: Volatility-Adjusted
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(252)
+        volatility_adjusted_risk = risk_per_trade / (volatility * 100)  # Adjust for volatility
+        position_size_volatility = (account_size * (volatility_adjusted_risk / 100)) / current_price
+
+    table = pd.DataFrame(
+        {
+            "current_price": current_price,
+            "atr": atr,
+            "position_size_fixed": position_size_fixed,
+            "kelly_fraction": kelly_fraction,
+            "position_size_kelly": position_size_kelly,
+            "volatility": volatility,
+            "position_size_volatility": position_size_volatility,
+        },
+        index=panel["Close"].columns,
+    )
+    table["shares"] = (
+        table[["position_size_fixed", "position_size_kelly", "position_size_volatility"]]
+        .min(axis=1, skipna=False)
+        .fillna(0)
+        .astype(int)
+    )
+    return table
+
+
+def position_size_result(ticker, row, account_size, risk_per_trade, stop_loss_pct):
+    """The /position-size response for one row of position_size_table()."""
+    risk_amount_fixed = account_size * (risk_per_trade / 100)
+    return {
+        "ticker": ticker,
+        "current_price": row["current_price"],
+        "account_size": account_size,
+        "atr": row["atr"],
+        "methods": {
+            "fixed_risk": {
+                "position_size": row["position_size_fixed"],
+                "risk_amount": risk_amount_fixed,
+                "stop_loss": stop_loss_pct,
+                "description": f"Risk {risk_per_trade}% of account ({risk_amount_fixed:.2f}) on this trade"
+            },
+            "kelly_criterion": {
+                "position_size": row["position_size_kelly"],
+                "kelly_fraction": row["kelly_fraction"],
+                "description": f"Kelly Criterion suggests {row['kelly_fraction']*100:.1f}% of capital"
+            },
+            "volatility_adjusted": {
+                "position_size": row["position_size_volatility"],
+                "volatility": row["volatility"],
+                "description": f"Adjusted for {row['volatility']*100:.1f}% annual volatility"
+            }
+        },
+        "recommended": {
+            "shares": int(row["shares"]),
+            "value": row["current_price"] * int(row["shares"]),
+            "risk_percentage": risk_per_trade
+        }
+    }
+
+
 @app.get("/position-size/{ticker}")
 def calculate_position_size(
     ticker: str, 
@@ -1069,91 +3388,179 @@ def calculate_position_size(
     stop_loss_pct: float = 5.0
 ):
     """Calculate optimal position size using various methods"""
+    validate_account(account_size)
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="1y")
+        table = position_size_table([ticker], account_size, risk_per_trade, stop_loss_pct)
         
-        if hist.empty:
+        if table.empty:
             raise HTTPException(status_code=404, detail="No historical data found")
         
-        current_price = hist['Close'].iloc[-1]
-        returns = hist['Close'].pct_change().dropna()
-        
-        # Calculate ATR for volatility-based position sizing
-        high_low = hist['High'] - hist['Low']
-        high_close = abs(hist['High'] - hist['Close'].shift(1))
-        low_close = abs(hist['Low'] - hist['Close'].shift(1))
-        
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr = true_range.rolling(window=14).mean().iloc[-1]
-        
-        # Method 1: Fixed Risk per Trade
-        risk_amount_fixed = account_size * (risk_per_trade / 100)
-        stop_loss_amount_fixed = current_price * (stop_loss_pct / 100)
-        position_size_fixed = risk_amount_fixed / stop_loss_amount_fixed
-        
-        # Method 2: Kelly Criterion (simplified)
-        if len(returns) > 30:
-            win_rate = len(returns[returns > 0]) / len(returns)
-            avg_win = returns[returns > 0].mean() if len(returns[returns > 0]) > 0 else 0
-            avg_loss = abs(returns[returns < 0].mean()) if len(returns[returns < 0]) > 0 else 0
-            
-            if avg_loss > 0:
-                kelly_fraction = win_rate - ((1 - win_rate) * (avg_win / avg_loss))
-                kelly_fraction = max(0, min(kelly_fraction, 0.25))  # Cap at 25%
-            else:
-                kelly_fraction = 0
-        else:
-            kelly_fraction = 0
-        
-        position_size_kelly = (account_size * kelly_fraction) / current_price
-        
-        # Method 3: Volatility-Adjusted
-        volatility = returns.std() * np.sqrt(252)
-        volatility_adjusted_risk = risk_per_trade / (volatility * 100)  # Adjust for volatility
-        position_size_volatility = (account_size * (volatility_adjusted_risk / 100)) / current_price
+        return position_size_result(ticker, table.iloc[0], account_size, risk_per_trade, stop_loss_pct)
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/position-sizes")
+async def calculate_position_sizes(
+    tickers: list[str],
+    account_size: float = 100000,
+    risk_per_trade: float = 2.0,
+    stop_loss_pct: float = 5.0,
+    total_capital: float | None = None,
+):
+    """
+    Position sizes for every ticker with one shared account and risk setup.
+    If the recommended positions together cost more than `total_capital`
+    (default: account_size), every position is scaled down by the same factor.
+    """
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    validate_account(account_size, total_capital)
+    await prefetch_ohlcv(tickers, "1y")
+    return await asyncio.to_thread(
+        position_sizes_response,
+        list(dict.fromkeys(tickers)), account_size, risk_per_trade, stop_loss_pct,
+        account_size if total_capital is None else total_capital,
+    )
+
+
+def position_sizes_response(tickers, account_size, risk_per_trade, stop_loss_pct, total_capital):
+    """Response body for /position-sizes."""
+    try:
+        table = position_size_table(tickers, account_size, risk_per_trade, stop_loss_pct)
+
+        # Scale every position by one factor to fit the capital constraint
+        required = float((table["shares"] * table["current_price"]).fillna(0).sum())
+        scale = min(1.0, total_capital / required) if required > 0 else 1.0
+        if scale < 1:
+            target = table["shares"] * scale
+            table["shares"] = np.floor(target).astype(int)
+            # Spend what flooring left over, largest remainders first
+            leftover = total_capital - float((table["shares"] * table["current_price"]).sum())
+            for ticker in (target - table["shares"]).sort_values(ascending=False).index:
+                price = table.at[ticker, "current_price"]
+                if target[ticker] > table.at[ticker, "shares"] and price <= leftover:
+                    table.at[ticker, "shares"] += 1
+                    leftover -= price
+
+        positions = [
+            position_size_result(ticker, row, account_size, risk_per_trade, stop_loss_pct)
+            for ticker, row in table.iterrows()
+        ]
         return {
-            "ticker": ticker,
-            "current_price": current_price,
             "account_size": account_size,
-            "atr": atr,
-            "methods": {
-                "fixed_risk": {
-                    "position_size": position_size_fixed,
-                    "risk_amount": risk_amount_fixed,
-                    "stop_loss": stop_loss_pct,
-                    "description": f"Risk {risk_per_trade}% of account ({risk_amount_fixed:.2f}) on this trade"
-                },
-                "kelly_criterion": {
-                    "position_size": position_size_kelly,
-                    "kelly_fraction": kelly_fraction,
-                    "description": f"Kelly Criterion suggests {kelly_fraction*100:.1f}% of capital"
-                },
-                "volatility_adjusted": {
-                    "position_size": position_size_volatility,
-                    "volatility": volatility,
-                    "description": f"Adjusted for {volatility*100:.1f}% annual volatility"
-                }
-            },
-            "recommended": {
-                "shares": int(min(position_size_fixed, position_size_kelly, position_size_volatility)),
-                "value": current_price * int(min(position_size_fixed, position_size_kelly, position_size_volatility)),
-                "risk_percentage": risk_per_trade
-            }
+            "total_capital": total_capital,
+            "required_capital": required,
+            "allocated_capital": float((table["shares"] * table["current_price"]).fillna(0).sum()),
+            "scale": scale,
+            "positions": positions,
+            "missing": [t for t in tickers if t not in table.index],
         }
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Column order of the binary /history layout
+HISTORY_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def history_columns(hist):
+    """
+    OHLCV bars as parallel arrays: "t" in epoch seconds (int64) plus one
+    float array per field. Bars without a close are dropped.
+    """
+    hist = hist[hist["Close"].notna()]
+    columns = {"t": hist.index.values.astype("datetime64[s]").astype(np.int64)}
+    for name, field in zip(HISTORY_COLUMNS, OHLCV_FIELDS):
+        columns[name] = hist[field].to_numpy(dtype=float)
+    return columns
+
+
+def pack_history(columns):
+    """
+    Binary /history body, little-endian: int64 t[n], then float32 arrays
+    for open, high, low, close and volume, n values each.
+    """
+    return b"".join(
+        [columns["t"].astype("<i8").tobytes()]
+        + [columns[name].astype("<f4").tobytes() for name in HISTORY_COLUMNS]
+    )
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps to draw the
+    series (x, y) with max_points points. First and last points are kept.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Interior points split into max_points - 2 buckets of [edges[i], edges[i + 1])
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # Each bucket is scored against the next bucket's average; the last against the last point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_ohlc(columns, max_points):
+    """
+    Merge history_columns() bars into at most max_points buckets: first open
+    and timestamp, highest high, lowest low, last close, summed volume.
+    """
+    n = len(columns["t"])
+    if max_points >= n or max_points < 1:
+        return columns
+
+    edges = np.linspace(0, n, max_points + 1).astype(int)
+    starts, ends = edges[:-1], edges[1:] - 1
+    return {
+        "t": columns["t"][starts],
+        "open": columns["open"][starts],
+        "high": np.fmax.reduceat(columns["high"], starts),
+        "low": np.fmin.reduceat(columns["low"], starts),
+        "close": columns["close"][ends],
+        "volume": np.add.reduceat(np.nan_to_num(columns["volume"]), starts),
+    }
+
+
 @app.get("/history/{ticker}")
-@cached(cache=history_cache)
-def get_history(ticker: str, timeframe: str = "1M"):
-    """Get historical data for charts based on timeframe."""
-    try:
-        stock = yf.Ticker(ticker)
+@json_response
+@async_cached(history_cache)
+@async_single_flight("chart_history")
+async def get_history(
+    ticker: str,
+    timeframe: str = "1M",
+    format: str = "rows",
+    max_points: int | None = None,
+):
+    """
+    Get historical data for charts based on timeframe.
 
+    format="rows" returns [{"date", "price"}]; "columnar" returns parallel
+    epoch/OHLCV arrays; "binary" returns them packed (see pack_history).
+    max_points downsamples to at most that many points: LTTB on the close
+    for rows, OHLC buckets otherwise. Each resolution is cached separately.
+    """
+    try:
         # Map timeframe to yfinance period and interval
         tf_map = {
             "1D": {"period": "1d", "interval": "5m"},
@@ -1167,45 +3574,59 @@ def get_history(ticker: str, timeframe: str = "1M"):
         if tf not in tf_map:
             tf = "1M"
 
-        hist = stock.history(
-            period=tf_map[tf]["period"], interval=tf_map[tf]["interval"]
+        hist = await get_ohlcv_async(
+            ticker, period=tf_map[tf]["period"], interval=tf_map[tf]["interval"]
         )
+        return await asyncio.to_thread(history_response, hist, tf, format, max_points)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Convert to list of dicts for frontend
-        data = []
-        for date, row in hist.iterrows():
-            # For intraday (1D, 1W), we want time as well. For daily/weekly (1M, 1Y, 5Y), just date.
-            if tf in ["1D", "1W"]:
-                date_str = date.strftime("%b %d %H:%M")
-            else:
-                date_str = date.strftime("%Y-%m-%d")
 
-            # Check for NaN which can break JSON
-            price = row["Close"]
-            if pd.isna(price):
-                continue
+def history_response(hist, tf, format, max_points):
+    """Body for /history: rows, columnar arrays or a packed binary Response."""
+    if format in ("columnar", "binary"):
+        columns = history_columns(hist)
+        if max_points:
+            columns = downsample_ohlc(columns, max_points)
+    if format == "columnar":
+        return {name: values.tolist() for name, values in columns.items()}
+    if format == "binary":
+        return Response(
+            pack_history(columns),
+            media_type="application/octet-stream",
+            headers={"X-Row-Count": str(len(columns["t"]))},
+        )
 
-            data.append({"date": date_str, "price": price})
+    # Check for NaN which can break JSON
+    hist = hist[hist["Close"].notna()]
+    if max_points:
+        hist = hist.iloc[
+            lttb_indices(
+                hist.index.values.astype("datetime64[s]").astype(float),
+                hist["Close"].to_numpy(dtype=float),
+                max_points,
+            )
+        ]
 
-        return data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # For intraday (1D, 1W), we want time as well. For daily/weekly (1M, 1Y, 5Y), just date.
+    date_format = "%b %d %H:%M" if tf in ["1D", "1W"] else "%Y-%m-%d"
+
+    # Convert to list of dicts for frontend
+    return [
+        {"date": date_str, "price": price}
+        for date_str, price in zip(hist.index.strftime(date_format), hist["Close"].tolist())
+    ]
 
 
 @app.get("/news/{ticker}")
-@cached(cache=news_cache)
-def get_stock_news(ticker: str):
+async def get_stock_news(ticker: str):
     """Get news and sentiment for a single ticker."""
     try:
         # Fetch news for the ticker
-        news_list = fetch_google_news(ticker, limit=10)
+        news_list = await get_ticker_news(ticker)
         
-        # Analyze sentiment
-        sentiment = analyze_sentiment(news_list)
-        
-        # Add ticker to each news item for frontend
-        for item in news_list:
-            item["ticker"] = ticker
+        # Running sentiment over every article seen for the ticker
+        sentiment = news_store.sentiment(ticker)
         
         return {
             "news": news_list,
@@ -1216,21 +3637,28 @@ def get_stock_news(ticker: str):
 
 
 @app.post("/portfolio-news")
-@cached(cache=news_cache)
-def get_portfolio_news(tickers: list[str]):
+async def get_portfolio_news(tickers: list[str]):
     """Get aggregated news and sentiment for portfolio tickers."""
     try:
         all_news = []
         
-        # Fetch news for each ticker
-        for ticker in tickers:
-            news_list = fetch_google_news(ticker, limit=5)  # Fewer per ticker to avoid overload
-            for item in news_list:
-                item["ticker"] = ticker
-            all_news.extend(news_list)
+        # Built from the per-ticker feeds: cached tickers cost nothing and
+        # only the missing ones are fetched, concurrently
+        unique = list(dict.fromkeys(tickers))
+        feeds = await asyncio.gather(
+            *(get_ticker_news(ticker) for ticker in unique), return_exceptions=True
+        )
+        for ticker, news_list in zip(unique, feeds):
+            if isinstance(news_list, BaseException):
+                print(f"Error fetching news for {ticker}: {news_list}")
+                continue
+            all_news.extend(news_list[:PORTFOLIO_NEWS_PER_TICKER])
+        
+        # Newest first across all tickers
+        all_news.sort(key=published_timestamp, reverse=True)
         
         # Analyze overall sentiment
-        sentiment = analyze_sentiment(all_news)
+        sentiment = news_store.sentiment(*unique)
         
         return {
             "news": all_news,
@@ -1243,8 +3671,7 @@ def get_portfolio_news(tickers: list[str]):
 def calculate_dcf(ticker, growth_rate=0.05, discount_rate=0.10, terminal_growth=0.03, years=5):
     """Calculate Discounted Cash Flow (DCF) valuation"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_fundamentals(ticker)
         
         # Get financial data
         if not info.get('freeCashflow') or not info.get('sharesOutstanding'):
@@ -1305,8 +3732,7 @@ def calculate_dcf(ticker, growth_rate=0.05, discount_rate=0.10, terminal_growth=
 def calculate_graham_number(ticker):
     """Calculate Graham Number for defensive stock valuation"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_fundamentals(ticker)
         
         # Get required data
         if not info.get('trailingEps') or not info.get('bookValue'):
@@ -1340,8 +3766,7 @@ def calculate_graham_number(ticker):
 def calculate_peter_lynch_fair_value(ticker):
     """Calculate Peter Lynch Fair Value"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_fundamentals(ticker)
         
         # Get required data
         if not info.get('trailingEps'):
@@ -1377,8 +3802,7 @@ def calculate_peter_lynch_fair_value(ticker):
 def calculate_advanced_fundamentals(ticker):
     """Calculate advanced fundamental metrics"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_fundamentals(ticker)
         
         # Basic metrics
         current_price = info.get('currentPrice') or info.get('regularMarketPrice', 0)
@@ -1469,11 +3893,26 @@ def get_valuation_models(
 ):
     """Get multiple valuation models for a ticker"""
     try:
-        # Calculate all valuation models
-        dcf_result = calculate_dcf(ticker, growth_rate, discount_rate)
-        graham_result = calculate_graham_number(ticker)
-        lynch_result = calculate_peter_lynch_fair_value(ticker)
-        fundamentals_result = calculate_advanced_fundamentals(ticker)
+        # Warm the fundamentals cache so the models below share one fetch
+        try:
+            get_fundamentals(ticker)
+        except Exception:
+            pass  # Each model reports its own error
+
+        # Calculate all valuation models concurrently
+        models, errors = fan_out({
+            "dcf": partial(calculate_dcf, ticker, growth_rate, discount_rate),
+            "graham_number": partial(calculate_graham_number, ticker),
+            "peter_lynch": partial(calculate_peter_lynch_fair_value, ticker),
+            "advanced_fundamentals": partial(calculate_advanced_fundamentals, ticker),
+        })
+        for name, message in errors.items():
+            models[name] = {"error": message}
+
+        dcf_result = models["dcf"]
+        graham_result = models["graham_number"]
+        lynch_result = models["peter_lynch"]
+        fundamentals_result = models["advanced_fundamentals"]
         
         # Calculate average fair value from available models
         fair_values = []
@@ -133,7 +133,7 @@ export const AdvancedChart: React.FC<AdvancedChartProps> = ({
     
     try {
       // Fetch historical data
-      const historyData = await getHistory(ticker, selectedTimeframe);
+      const historyData = await getHistory(ticker, selectedTimeframe, 500);
       
       // Transform data for chart
       const chartData: ChartDataPoint[] = historyData.map((item: any) => ({
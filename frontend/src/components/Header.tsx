@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { getIndices, getMarketStatus, MarketStatus, IndexData, searchTicker } from '../services/api';
+import { getIndices, getMarketStatus, subscribeQuotes, MarketStatus, IndexData, searchTicker } from '../services/api';
 import { Loader2, Search, Clock } from 'lucide-react';
 import { formatCompactINR } from '../lib/utils';
 import { useDebounce } from '../hooks/useDebounce';
@@ -50,8 +50,28 @@ export function Header({ onSelectStock }: HeaderProps) {
     };
 
     fetchData();
-    const interval = setInterval(fetchData, 60000);
-    return () => clearInterval(interval);
+    const interval = setInterval(async () => {
+      try {
+        setStatus(await getMarketStatus());
+      } catch (e) {
+        console.error("Failed to fetch market status", e);
+      }
+    }, 60000);
+
+    // Index prices are pushed by the quote stream
+    const unsubscribe = subscribeQuotes(['^NSEI', '^BSESN'], (quotes) => {
+      setIndices(prev => prev.map(index => {
+        const quote = quotes.find(q => q.symbol === index.symbol);
+        return quote
+          ? { ...index, price: quote.price, change: quote.change, percentChange: quote.percentChange }
+          : index;
+      }));
+    });
+
+    return () => {
+      clearInterval(interval);
+      unsubscribe();
+    };
   }, []);
 
   const handleSelectResult = (ticker: string) => {
@@ -407,7 +407,7 @@ export const RiskCalculator: React.FC<RiskCalculatorProps> = ({
                     <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
                       <MetricCard
                         title="Portfolio VaR (95%)"
-                        value={portfolioRisk.portfolio_metrics.var_95}
+                        value={portfolioRisk.portfolio_metrics.var_95 ?? 'N/A'}
                         prefix="₹"
                         status="bad"
                         icon={AlertTriangle}
@@ -416,7 +416,7 @@ export const RiskCalculator: React.FC<RiskCalculatorProps> = ({
                       
                       <MetricCard
                         title="Portfolio VaR (99%)"
-                        value={portfolioRisk.portfolio_metrics.var_99}
+                        value={portfolioRisk.portfolio_metrics.var_99 ?? 'N/A'}
                         prefix="₹"
                         status="bad"
                         icon={AlertTriangle}
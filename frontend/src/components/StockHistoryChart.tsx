@@ -38,7 +38,7 @@ export function StockHistoryChart({ ticker }: StockHistoryChartProps) {
         setLoading(true);
         setError(null);
         try {
-            const hist = await getHistory(ticker, timeframe);
+            const hist = await getHistory(ticker, timeframe, 300);
             if (isMounted) {
                 setData(hist);
             }
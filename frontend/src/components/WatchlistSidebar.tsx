@@ -23,7 +23,7 @@ const MiniSparkline = ({ ticker }: { ticker: string }) => {
         const fetchMiniHistory = async () => {
             setLoading(true);
             try {
-                const hist = await getHistory(ticker, '1D');
+                const hist = await getHistory(ticker, '1D', 60);
                 if (isMounted) setData(hist);
             } catch (e) {
                 console.error("Sidebar hist error:", e);
@@ -1,8 +1,14 @@
 import { useState, useEffect, useMemo } from 'react';
 import { Stock, PortfolioSummary } from '../types';
-import { getQuotes, Quote } from '../services/api';
+import { getQuotes, subscribeQuotes, Quote } from '../services/api';
 import { useSettings } from '../context/SettingsContext';
 
+const REFRESH_INTERVAL_MS: Record<string, number> = {
+  '15s': 15_000,
+  '30s': 30_000,
+  '1m': 60_000,
+};
+
 export function useDashboardData(portfolio: Stock[]) {
   const [prices, setPrices] = useState<Record<string, Quote>>({});
   const [loading, setLoading] = useState(true);
@@ -35,11 +41,36 @@ export function useDashboardData(portfolio: Stock[]) {
   useEffect(() => {
     fetchPrices();
     
-    if (refreshInterval === 'manual') return;
+    if (refreshInterval === 'manual' || portfolio.length === 0) return;
+
+    // Live updates are pushed by the server instead of polled per tab.
+    // The server ticks faster than the slower settings, so quotes are
+    // buffered and applied at most once per chosen interval.
+    const intervalMs = REFRESH_INTERVAL_MS[refreshInterval];
+    let pending: Record<string, Quote> = {};
+    let lastApplied = 0;
+    let timer: ReturnType<typeof setTimeout> | undefined;
 
-    const ms = refreshInterval === '15s' ? 15000 : refreshInterval === '30s' ? 30000 : 60000;
-    const interval = setInterval(fetchPrices, ms);
-    return () => clearInterval(interval);
+    const flush = () => {
+      timer = undefined;
+      lastApplied = Date.now();
+      const updates = pending;
+      pending = {};
+      setPrices(prev => ({ ...prev, ...updates }));
+    };
+
+    const unsubscribe = subscribeQuotes(portfolio.map(s => s.ticker), (quotes) => {
+      quotes.forEach(q => {
+        pending[q.symbol] = q;
+      });
+      if (timer === undefined) {
+        timer = setTimeout(flush, Math.max(0, lastApplied + intervalMs - Date.now()));
+      }
+    });
+    return () => {
+      clearTimeout(timer);
+      unsubscribe();
+    };
   }, [portfolio, refreshInterval]); 
 
   const summary = useMemo(() => {
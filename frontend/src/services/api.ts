@@ -3,9 +3,12 @@ import {
   TechnicalAnalysisResponse, 
   SupportResistanceResponse, 
   PivotPoints,
+  MultiTimeframePivots,
   PortfolioRiskAnalysis,
   CorrelationMatrixResponse,
-  PositionSizeCalculation
+  PositionSizeCalculation,
+  PortfolioPositionSizes,
+  PortfolioVaR
 } from '../types';
 
 const API_URL = 'http://localhost:8000';
@@ -13,6 +16,7 @@ const API_URL = 'http://localhost:8000';
 export interface MarketStatus {
   isOpen: boolean;
   message: string;
+  nextOpen?: string; // ISO timestamp of the next session open, when closed
 }
 
 export interface Quote {
@@ -26,6 +30,8 @@ export interface Quote {
   yearHigh?: number;
   yearLow?: number;
   marketCap?: number;
+  dataAge?: number; // seconds since the data was fetched upstream
+  stale?: boolean;
 }
 
 export interface IndexData {
@@ -34,6 +40,8 @@ export interface IndexData {
     price: number;
     change: number;
     percentChange: number;
+    dataAge?: number;
+    stale?: boolean;
 }
 
 export const getMarketStatus = async (): Promise<MarketStatus> => {
@@ -52,6 +60,17 @@ export const getQuotes = async (tickers: string[]): Promise<Quote[]> => {
   return response.data;
 };
 
+// Server-push quote updates. The server polls each distinct symbol once per
+// tick for all clients and sends only quotes that changed.
+export const subscribeQuotes = (tickers: string[], onQuotes: (quotes: Quote[]) => void): (() => void) => {
+  const params = new URLSearchParams({ tickers: tickers.join(',') });
+  const source = new EventSource(`${API_URL}/stream/quotes?${params}`);
+  source.addEventListener('quotes', (event) => {
+    onQuotes(JSON.parse((event as MessageEvent).data));
+  });
+  return () => source.close();
+};
+
 export const getBatchAnalytics = async (tickers: string[]): Promise<any[]> => {
   if (tickers.length === 0) return [];
   const response = await axios.post(`${API_URL}/batch-analytics`, tickers);
@@ -63,8 +82,28 @@ export const searchTicker = async (query: string) => {
   return response.data;
 };
 
-export const getHistory = async (ticker: string, timeframe: string = '1M') => {
-    const response = await axios.get(`${API_URL}/history/${ticker}?timeframe=${timeframe}`);
+// maxPoints caps the series length; the server downsamples longer ranges
+export const getHistory = async (ticker: string, timeframe: string = '1M', maxPoints?: number) => {
+    const response = await axios.get(`${API_URL}/history/${ticker}`, {
+        params: { timeframe, max_points: maxPoints }
+    });
+    return response.data;
+}
+
+// Parallel arrays, t in epoch seconds
+export interface HistoryColumns {
+  t: number[];
+  open: number[];
+  high: number[];
+  low: number[];
+  close: number[];
+  volume: number[];
+}
+
+export const getHistoryColumns = async (ticker: string, timeframe: string = '1M', maxPoints?: number): Promise<HistoryColumns> => {
+    const response = await axios.get(`${API_URL}/history/${ticker}`, {
+        params: { timeframe, format: 'columnar', max_points: maxPoints }
+    });
     return response.data;
 }
 
@@ -99,15 +138,84 @@ export const getPivotPoints = async (ticker: string, method: string = "classic")
     return response.data;
 }
 
+export const getMultiTimeframePivots = async (ticker: string): Promise<MultiTimeframePivots> => {
+    const response = await axios.get(`${API_URL}/pivots/${ticker}`);
+    return response.data;
+}
+
+export const getWatchlistPivots = async (
+  tickers: string[]
+): Promise<{ pivots: MultiTimeframePivots[]; missing: string[] }> => {
+    const response = await axios.post(`${API_URL}/pivots`, tickers);
+    return response.data;
+}
+
 // Risk Management API endpoints
-export const getPortfolioRiskAnalysis = async (tickers: string[]): Promise<PortfolioRiskAnalysis> => {
-    const response = await axios.post(`${API_URL}/risk-analysis`, tickers);
+// benchmark: nifty50 (default), sensex, niftybank, niftyit, ... or an index symbol
+export const getPortfolioRiskAnalysis = async (tickers: string[], benchmark?: string): Promise<PortfolioRiskAnalysis> => {
+    const response = await axios.post(`${API_URL}/risk-analysis`, tickers, { params: { benchmark } });
+    return response.data;
+}
+
+// holdings: ticker -> weight or position value (normalized server-side)
+export const getPortfolioVaR = async (
+  holdings: Record<string, number>,
+  options: { horizon?: number; paths?: number; seed?: number } = {}
+): Promise<PortfolioVaR> => {
+    const response = await axios.post(`${API_URL}/portfolio-var`, holdings, { params: options });
     return response.data;
 }
 
 export const getCorrelationMatrix = async (tickers: string[]): Promise<CorrelationMatrixResponse> => {
     const tickerString = tickers.join(',');
-    const response = await axios.get(`${API_URL}/correlation-matrix?tickers=${tickerString}`);
+    // The upper triangle is ~half the payload of the nested format; expand it here
+    const response = await axios.get(`${API_URL}/correlation-matrix?tickers=${tickerString}&format=upper`);
+    const { tickers: names, upper } = response.data as { tickers: string[]; upper: (number | null)[] };
+
+    const correlation_matrix: Record<string, Record<string, number>> = {};
+    names.forEach((ticker) => { correlation_matrix[ticker] = { [ticker]: 1 }; });
+    let k = 0;
+    for (let i = 0; i < names.length; i++) {
+        for (let j = i + 1; j < names.length; j++) {
+            const value = upper[k++] ?? NaN;
+            correlation_matrix[names[i]][names[j]] = value;
+            correlation_matrix[names[j]][names[i]] = value;
+        }
+    }
+    return { tickers: names, correlation_matrix };
+}
+
+export interface ScreenerRow {
+  symbol: string;
+  price: number;
+  change: number | null;
+  rsi: number | null;
+  macd: number | null;
+  macd_signal: number | null;
+  macd_histogram: number | null;
+  bollinger_position: number | null;
+  bollinger_bandwidth: number | null;
+  adx: number | null;
+  di_plus: number | null;
+  di_minus: number | null;
+  atr: number | null;
+  atr_percent: number | null;
+}
+
+export interface ScreenerResponse {
+  scanned: number;
+  matched: number;
+  missing: string[];
+  results: ScreenerRow[];
+}
+
+// filter e.g. "rsi < 30 and adx > 25"; sort a field name, "-" prefix for descending
+export const getScreener = async (
+  options: { universe?: string; tickers?: string[]; filter?: string; sort?: string; limit?: number } = {}
+): Promise<ScreenerResponse> => {
+    const response = await axios.get(`${API_URL}/screener`, {
+        params: { ...options, tickers: options.tickers?.join(',') }
+    });
     return response.data;
 }
 
@@ -125,3 +233,21 @@ export const getPositionSizeCalculation = async (
     const response = await axios.get(`${API_URL}/position-size/${ticker}?${params}`);
     return response.data;
 }
+
+export const getPositionSizes = async (
+    tickers: string[],
+    accountSize: number = 100000,
+    riskPerTrade: number = 2.0,
+    stopLossPct: number = 5.0,
+    totalCapital?: number
+): Promise<PortfolioPositionSizes> => {
+    const response = await axios.post(`${API_URL}/position-sizes`, tickers, {
+        params: {
+            account_size: accountSize,
+            risk_per_trade: riskPerTrade,
+            stop_loss_pct: stopLossPct,
+            total_capital: totalCapital
+        }
+    });
+    return response.data;
+}
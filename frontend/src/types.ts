@@ -141,6 +141,20 @@ export interface PivotPoints {
   position: "above_pivot" | "below_pivot";
 }
 
+export interface TimeframePivots {
+  period: string; // start date of the completed period the pivots come from
+  high: number;
+  low: number;
+  close: number;
+  pivots: Record<"classic" | "woodie" | "camarilla", PivotPoints>;
+}
+
+export interface MultiTimeframePivots {
+  symbol: string;
+  current_price: number;
+  timeframes: Partial<Record<"daily" | "weekly" | "monthly", TimeframePivots>>;
+}
+
 export interface AdvancedTechnicalIndicators {
   macd?: MACD;
   bollinger?: BollingerBands;
@@ -166,9 +180,12 @@ export interface SupportResistanceResponse {
 export interface RiskMetrics {
   var_95: number;
   var_99: number;
+  cvar_95?: number;
+  cvar_99?: number;
   max_drawdown: number;
   volatility: number;
   beta: number;
+  alpha?: number; // annualized, against the chosen benchmark
   sharpe_ratio: number;
   data_points: number;
   error?: string;
@@ -176,13 +193,45 @@ export interface RiskMetrics {
 
 export interface PortfolioRiskAnalysis {
   individual_assets: Record<string, RiskMetrics>;
+  benchmark?: string;
   portfolio_metrics: {
-    var_95: number;
-    var_99: number;
+    // null when the holdings share too little history
+    var_95: number | null;
+    var_99: number | null;
+    historical_var_95?: number | null;
+    historical_var_99?: number | null;
+    observations?: number;
+    pairwise_observations?: number;
     correlation_matrix: Record<string, Record<string, number>>;
   } | null;
 }
 
+// VaR/CVaR as positive fractions of portfolio value over `horizon` days
+export interface PortfolioVaR {
+  weights: Record<string, number>;
+  observations: number;
+  pairwise_observations: number;
+  horizon: number;
+  expected_return: number;
+  volatility: number;
+  parametric_var_95: number;
+  parametric_var_99: number;
+  parametric_cvar_95: number;
+  parametric_cvar_99: number;
+  historical_var_95: number;
+  historical_var_99: number;
+  historical_cvar_95: number;
+  historical_cvar_99: number;
+  monte_carlo_var_95?: number;
+  monte_carlo_var_99?: number;
+  monte_carlo_cvar_95?: number;
+  monte_carlo_cvar_99?: number;
+  paths?: number;
+  seed?: number;
+  // Student-t tail parameter of the simulation; null when tails are normal
+  degrees_of_freedom?: number | null;
+}
+
 export interface CorrelationMatrixResponse {
   tickers: string[];
   correlation_matrix: Record<string, Record<string, number>>;
@@ -223,6 +272,16 @@ export interface PositionSizeCalculation {
   };
 }
 
+export interface PortfolioPositionSizes {
+  account_size: number;
+  total_capital: number;
+  required_capital: number;
+  allocated_capital: number;
+  scale: number; // factor applied to every position to fit total_capital
+  positions: PositionSizeCalculation[];
+  missing: string[];
+}
+
 export interface NewsArticle {
     title: string;
     publisher: string;
@@ -236,4 +295,6 @@ export interface Sentiment {
     score: number;
     label: 'Bullish' | 'Bearish' | 'Neutral';
     detail: string;
+    articles?: number;
+    averageScore?: number;
 }